@@ -1,23 +1,38 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-from datetime import datetime, date
-import google.generativeai as genai
+import numpy as np
+from datetime import datetime
 import os
-import json
-from PIL import Image, ImageEnhance
-import requests
-import io
-import socket
+import base64
+import html
 import re
-import qrcode
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+import multiprocessing
 from streamlit_gsheets import GSheetsConnection
-import difflib
+from book_cache import SnapshotCache
+from write_queue import WriteBehindQueue, apply_patches
+from storage import BOOK_COLUMNS, DEFAULT_CATEGORIES, open_storage
+from schema import TAG_LIST, cell_str, concat_books, typed_books
+from search_index import SEARCH_FIELDS, SearchIndex, normalize_text
+from metadata_cache import MetadataCache, MISSING
+from http_client import HttpClient, RateLimiter
+from cover_cache import CoverCache
+from cover_backfill import CoverBackfillWorker
+from barcode_scan import decode_isbn, decode_all_isbns
+from video_scan import LiveScanner
+from fuzzy_dupes import DuplicateFinder
+from isbn_utils import IsbnIndex, canonical_isbn, clean_isbn, clean_isbn_column, to_isbn10, to_isbn13
+import profiler
+from profiler import span, timed, bind
 try:
-    from pyzbar.pyzbar import decode
-    PYZBAR_AVAILABLE = True
+    from streamlit_webrtc import webrtc_streamer, WebRtcMode
+    WEBRTC_AVAILABLE = True
 except ImportError:
-    PYZBAR_AVAILABLE = False
+    WEBRTC_AVAILABLE = False
 
 # --- 1. Settings & CSS Styling ---
 st.set_page_config(layout="wide", page_title="BookLog DB", page_icon="favicon.png")
@@ -34,6 +49,10 @@ st.markdown("""
 </script>
 """, unsafe_allow_html=True)
 
+# Card styles live next to the card grid component so both renderers share them
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "card_grid", "cards.css"), encoding="utf-8") as _f:
+    CARD_CSS = _f.read()
+
 # Custom CSS with ROBUST Device Separation
 st.markdown("""
 <style>
@@ -274,83 +293,7 @@ div[data-testid="stExpander"] p {
     box-shadow: 0 6px 20px rgba(229, 46, 113, 0.6) !important;
 }
 
-/* 6. GLASS CARD STYLING */
-.glass-card {
-    background-color: rgba(255, 255, 255, 0.1);
-    border-radius: 16px;
-    padding: 20px;
-    margin-bottom: 20px;
-    border: 1px solid rgba(255, 255, 255, 0.2);
-    backdrop-filter: blur(10px);
-    display: flex;
-    flex-direction: row;
-    align-items: flex-start;
-    gap: 20px;
-    box-shadow: 0 4px 30px rgba(0, 0, 0, 0.1);
-}
-.glass-card-img-box {
-    width: 120px;
-    flex-shrink: 0;
-    border-radius: 8px;
-    overflow: hidden;
-    background: transparent;
-}
-.glass-card-img {
-    width: 100%;
-    height: auto;
-    display: block;
-    box-shadow: 0 4px 8px rgba(0,0,0,0.3);
-}
-.glass-card-content {
-    flex-grow: 1;
-    color: #ffffff;
-}
-.glass-card-title {
-    font-size: 1.4rem;
-    font-weight: 700;
-    margin: 0 0 5px 0;
-    line-height: 1.3;
-}
-.glass-card-author {
-    font-size: 0.9rem;
-    color: rgba(255,255,255,0.8);
-    margin-bottom: 10px;
-}
-.tag-badge {
-    background: rgba(255,255,255,0.2);
-    padding: 3px 10px;
-    border-radius: 12px;
-    font-size: 0.75rem;
-    margin-right: 5px;
-    color: #ffffff;
-    border: 1px solid rgba(255,255,255,0.3);
-    display: inline-block;
-}
-.note-box {
-    background: rgba(0,0,0,0.25);
-    padding: 10px;
-    border-radius: 8px;
-    border-left: 4px solid #ff8a00;
-    color: #f0f0f0;
-    font-size: 0.9rem;
-    margin-top: 10px;
-}
-
-/* Mobile Adjustments */
-@media (max-width: 767px) {
-    .glass-card {
-        flex-direction: column;
-        align-items: center;
-        text-align: center;
-    }
-    .glass-card-img-box {
-        width: 140px;
-        margin-bottom: 15px;
-    }
-    .note-box {
-        text-align: left;
-    }
-}
+""" + CARD_CSS + """
 
 /* Device Separation Logic (Robust / Exclusion Based) */
 /* Prevent hiding the ROOT container by ensuring we only hide containers that have ONE marker but NOT the other. */
@@ -374,54 +317,113 @@ div[data-testid="stExpander"] p {
 """, unsafe_allow_html=True)
 
 # s --- 2. Database Functions ---
-def to_isbn10(isbn13):
-    if not isbn13 or len(isbn13) != 13: return None
-    body = isbn13[3:12]
-    checksum = 0
-    for i, digit in enumerate(body):
-        checksum += int(digit) * (10 - i)
-    remainder = checksum % 11
-    check_digit = 11 - remainder
-    if check_digit == 10: check_digit = 'X'
-    elif check_digit == 11: check_digit = '0'
-    else: check_digit = str(check_digit)
-    return body + check_digit
+def get_setting(name, default=None):
+    """Read an app setting from the [booklog] section of secrets.toml"""
+    try:
+        return st.secrets.get("booklog", {}).get(name, default)
+    except Exception:
+        return default
 
 def get_conn():
     return st.connection("gsheets", type=GSheetsConnection)
 
+@st.cache_resource
+def _open_local_storage(kind, path):
+    return open_storage(kind, sqlite_path=path, parquet_dir=path)
+
+def get_storage():
+    """Books / categories backend chosen by the `storage` setting ("sheets" / "sqlite" / "parquet")"""
+    kind = get_setting("storage", "sheets")
+    if kind == "sheets":
+        return open_storage("sheets", conn=get_conn())
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    if kind == "sqlite":
+        return _open_local_storage(kind, get_setting("sqlite_path", os.path.join(app_dir, "booklog.sqlite3")))
+    return _open_local_storage(kind, get_setting("parquet_dir", os.path.join(app_dir, "booklog_data")))
+
+@st.cache_resource
+def get_books_cache():
+    # One snapshot for every session in this process; a background refresh that finds
+    # the same rows keeps the version, so nobody reruns (or rebuilds indexes) for nothing
+    return SnapshotCache(max_age=get_setting("books_cache_max_age", 300), same=lambda a, b: a.equals(b))
+
+@st.cache_resource
+def get_categories_cache():
+    return SnapshotCache(max_age=get_setting("categories_cache_max_age", 600), same=lambda a, b: a == b)
+
+def load_books(storage):
+    """Full read of the books table (used by the cache loader)"""
+    with span("storage.read", table="books", backend=storage.name) as s:
+        df = storage.read_books()
+        s.set(rows=len(df))
+    if df.empty or len(df.columns) == 0:
+        return typed_books(pd.DataFrame(columns=BOOK_COLUMNS))
+    # Dtypes and empty cells are settled here once (schema.py); nothing downstream re-checks for "nan"
+    df = typed_books(df)
+    if 'created_at' in df.columns:
+        df = df.sort_values("created_at", ascending=False, na_position="last")
+    if 'isbn' in df.columns:
+        df['isbn'] = clean_isbn_column(df['isbn'])
+    return df
+
 def get_books():
+    """Cached books snapshot. Treat the result as read-only (copy before mutating)."""
     try:
-        conn = get_conn()
-        df = conn.read(worksheet="books", ttl=0)
-        expected = ["id", "title", "author", "category", "tags", "status", "notes", "cover_url", "read_date", "isbn", "created_at"]
-        if df.empty or len(df.columns) == 0:
-            return pd.DataFrame(columns=expected)
-        if 'id' in df.columns:
-            df['id'] = pd.to_numeric(df['id'], errors='coerce').fillna(0).astype(int)
-        if 'created_at' in df.columns:
-            df = df.sort_values("created_at", ascending=False)
-        if 'isbn' in df.columns:
-            df['isbn'] = df['isbn'].astype(str).str.replace(r'\.0$', '', regex=True)
-        return df
+        with span("get_books") as s:
+            storage = get_storage()
+            queue = get_write_queue()
+            # Edits still waiting in the write-behind queue (or flushed mid-read) are overlaid on every fresh load
+            df = get_books_cache().get(lambda: queue.load(lambda: load_books(storage)))
+            s.set(rows=len(df), version=get_books_cache().version)
+            return df
     except Exception as e:
-        return pd.DataFrame()
+        # Not an empty library: writers check attrs["load_error"] and refuse to touch storage
+        df = pd.DataFrame()
+        df.attrs["load_error"] = str(e)
+        return df
+
+def invalidate_books():
+    get_books_cache().invalidate()
+
+def _load_categories(storage):
+    with span("storage.read", table="categories", backend=storage.name):
+        return storage.read_categories() or list(DEFAULT_CATEGORIES)
 
 def get_categories():
+    """Shared categories snapshot (read once per process, refreshed in the background)"""
     try:
-        conn = get_conn()
-        df = conn.read(worksheet="categories", ttl=0)
-        if df.empty: return ["技術書", "ビジネス", "小説", "その他"]
-        return df['name'].tolist()
+        storage = get_storage()
+        return get_categories_cache().get(lambda: _load_categories(storage))
     except:
-        return ["技術書", "ビジネス", "小説", "その他"]
+        return list(DEFAULT_CATEGORIES)
+
+def snapshot_versions():
+    return get_books_cache().version, get_categories_cache().version
+
+@st.fragment(run_every=get_setting("sync_interval", 10) or None)
+def _watch_snapshot_versions():
+    """Rerun this session when another session's write (or a refresh) changed the shared snapshot.
+    Only compares in-memory version counters; nothing is read from storage here."""
+    if st.session_state.get("edit_target") is not None:
+        return  # don't pull the list out from under an open edit form
+    if st.session_state.get("seen_versions") != snapshot_versions():
+        st.rerun(scope="app")
 
-def add_book(title, author, category, tags_str, status, notes, cover_url, read_date, isbn):
+def add_book(title, author, category, tags_str, status, notes, cover_url, read_date, isbn, allow_duplicate=False):
     try:
-        conn = get_conn()
+        storage = get_storage()
         books_df = get_books()
-        new_id = books_df['id'].max() + 1 if not books_df.empty else 1
-        new_row = pd.DataFrame([{
+        if books_df.attrs.get("load_error"):
+            st.error(f"蔵書データを読み込めないため登録できません: {books_df.attrs['load_error']}")
+            return False
+        dup_id = find_registered(isbn, books_df) if isbn else None
+        if dup_id is not None and not allow_duplicate:
+            st.error(f"このISBNの本は登録済みです (ID: {dup_id})")
+            return False
+        # Ids with a queued delete are still taken until the queue is flushed
+        max_id = int(books_df['id'].max()) if not books_df.empty else 0
+        new_id = max(max_id, get_write_queue().max_id()) + 1
+        new_book = {
             "id": new_id,
             "title": title,
             "author": author,
@@ -433,79 +435,245 @@ def add_book(title, author, category, tags_str, status, notes, cover_url, read_d
             "read_date": read_date,
             "isbn": isbn,
             "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }])
-        updated_df = pd.concat([books_df, new_row], ignore_index=True)
-        conn.update(worksheet="books", data=updated_df)
+        }
+        new_row = typed_books(pd.DataFrame([new_book]))
+        # Decide before sending: an append that reached storage must never be followed by a rewrite.
+        # Appends need a header row (re-checked against storage when the snapshot is empty)
+        # and, for Sheets, a service account client.
+        current = None if not books_df.empty else storage.read_books()
+        if storage.can_append() and (current is None or len(current.columns)):
+            storage.insert_books([new_book], [c for c in books_df.columns if c != TAG_LIST])
+            try:
+                get_books_cache().update(lambda df: concat_books([new_row, df]), carry=carry_inserted(new_row))
+            except Exception:
+                invalidate_books()  # the row is stored; reload instead of patching
+                raise
+        else:
+            # Full rewrite from a fresh read, never from the cached snapshot
+            current = storage.read_books() if current is None else current
+            if len(current.columns) == 0:
+                updated_df = pd.DataFrame([new_book], columns=BOOK_COLUMNS)
+            else:
+                ids = pd.to_numeric(current['id'], errors="coerce") if 'id' in current.columns else pd.Series(dtype=float)
+                new_book["id"] = max(new_id, int(ids.max()) + 1 if ids.notna().any() else 0)
+                updated_df = pd.concat([current, pd.DataFrame([new_book])], ignore_index=True)
+            storage.replace_books(updated_df)
+            invalidate_books()
         return True
     except Exception as e:
         st.error(f"Error: {e}")
         return False
 
+@st.cache_resource
+def get_write_queue():
+    return WriteBehindQueue(
+        lambda patches, deletes: get_storage().patch_books(patches, deletes),
+        journal_path=get_setting("write_journal_path", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".booklog_journal.jsonl")),
+        flush_interval=get_setting("write_flush_interval", 5),
+        max_pending=get_setting("write_max_pending", 20),
+    )
+
 def update_book(book_id, title, author, category, tags, status, notes, read_date):
     try:
-        conn = get_conn()
-        df = get_books()
-        idx = df[df['id'] == book_id].index
-        if len(idx) > 0:
-            df.at[idx[0], 'title'] = title
-            df.at[idx[0], 'author'] = author
-            df.at[idx[0], 'category'] = category
-            df.at[idx[0], 'tags'] = tags
-            df.at[idx[0], 'status'] = status
-            df.at[idx[0], 'notes'] = notes
-            df.at[idx[0], 'read_date'] = read_date
-            conn.update(worksheet="books", data=df)
-            return True
+        fields = {
+            "title": title,
+            "author": author,
+            "category": category,
+            "tags": tags,
+            "status": status,
+            "notes": notes,
+            "read_date": read_date,
+        }
+        get_write_queue().patch(book_id, fields)
+        get_books_cache().update(lambda df: apply_patches(df, {int(book_id): fields}), carry=carry_patched([int(book_id)], fields))
+        return True
     except Exception as e:
         st.error(f"Update Error: {e}")
         return False
 
 def delete_book(book_id):
     try:
-        conn = get_conn()
-        df = get_books()
-        df = df[df['id'] != book_id]
-        conn.update(worksheet="books", data=df)
+        get_write_queue().delete(book_id)
+        get_books_cache().update(lambda df: apply_patches(df, {}, [int(book_id)]), carry=carry_deleted([int(book_id)]))
         return True
     except Exception as e:
         st.error(f"Delete Error: {e}")
         return False
 
+# --- Derived indexes across local writes ---
+# Passed as update(carry=...): a write-through patches the per-snapshot indexes
+# instead of leaving the next reader to rebuild them from the whole frame.
+def carry_inserted(new_rows):
+    """Rows prepended to the snapshot (add_book / add_books_bulk)"""
+    books = list(zip(new_rows['isbn'].tolist(), new_rows['id'].tolist()))
+    return {
+        "isbn_index": lambda index, old, new: index.add(books),
+        "search_index": lambda index, old, new: index.prepended(new_rows),
+    }
+
+def carry_patched(book_ids, fields):
+    """Rows edited in place (only `fields` changed)"""
+    carry = {} if "isbn" in fields else {"isbn_index": lambda index, old, new: index}
+    if set(fields) & set(SEARCH_FIELDS):
+        carry["search_index"] = lambda index, old, new: index.replaced(new, np.flatnonzero(new['id'].isin(book_ids)))
+    else:
+        carry["search_index"] = lambda index, old, new: index
+    return carry
+
+def carry_deleted(book_ids):
+    def isbn_index(index, old, new):
+        gone = old[old['id'].isin(book_ids)]
+        return index.remove(zip(gone['isbn'].tolist(), gone['id'].tolist()))
+    return {
+        "isbn_index": isbn_index,
+        "search_index": lambda index, old, new: index.dropped(np.flatnonzero(old['id'].isin(book_ids))),
+    }
+
+def find_registered(isbn, df=None):
+    """id of an already registered book with this ISBN (any spelling), or None"""
+    df = get_books() if df is None else df
+    return get_books_cache().derive("isbn_index", IsbnIndex.from_frame, df).get(isbn)
+
+@st.cache_resource
+def get_duplicate_finder():
+    return DuplicateFinder(threshold=get_setting("duplicate_threshold", 0.6))
+
+@timed("duplicates.sync")
+def _synced_finder(df):
+    finder = get_duplicate_finder()
+    # The finder remembers which snapshot version it was synced to: a frame that isn't the current
+    # snapshot (version None) is synced without a version, so the next current query resyncs.
+    # Each sync only hashes rows added / edited since the last one.
+    version = get_books_cache().version_of(df)
+    if version is None or finder.version != version:
+        finder.sync(df, version)
+    return finder
+
+def find_similar_books(title, author="", df=None):
+    """[(id, score)] of registered books whose title looks like the same book (no ISBN needed)"""
+    df = get_books() if df is None else df
+    return _synced_finder(df).query(title, author)
+
+def duplicate_report(df):
+    """DataFrame of near-duplicate pairs in the whole collection"""
+    pairs = _synced_finder(df).report()
+    titles = dict(zip(df['id'], df['title'])) if not df.empty else {}
+    return pd.DataFrame(
+        [{"ID A": a, "タイトル A": titles.get(a, ""), "ID B": b, "タイトル B": titles.get(b, ""), "類似度": score}
+         for a, b, score in pairs],
+        columns=["ID A", "タイトル A", "ID B", "タイトル B", "類似度"],
+    )
+
+def _filter_positions(df, query, cats):
+    """Row positions matching the keyword (best match first) and any of `cats`"""
+    if query:
+        positions = get_books_cache().derive("search_index", SearchIndex.from_frame, df).search(query)
+    else:
+        positions = np.arange(len(df))
+    if cats and len(positions):
+        # Compare the small integer category codes instead of strings
+        col = df['category']
+        codes = col.cat.categories.get_indexer(list(cats))
+        positions = positions[np.isin(col.cat.codes.to_numpy()[positions], codes[codes >= 0])]
+    return positions.astype(np.int32)
+
+def filter_positions(df, view, query, cats=()):
+    """Row positions of `df` for the current filters. Memoized in session_state per
+    (snapshot version, view, query, categories) with LRU eviction, so reruns that
+    don't touch the filters (opening an edit form, paging) skip filtering entirely."""
+    version = get_books_cache().version_of(df)
+    if version is None:  # not the shared snapshot (e.g. load error fallback)
+        with span("filter", view=view, memo="off"):
+            return _filter_positions(df, query, cats)
+    memo = st.session_state.setdefault("filter_memo", OrderedDict())
+    key = (version, view, query, tuple(cats))
+    with span("filter", view=view) as s:
+        if key in memo:
+            memo.move_to_end(key)
+            s.set(memo="hit", rows=len(memo[key]))
+            return memo[key]
+        positions = memo[key] = _filter_positions(df, query, cats)
+        s.set(memo="miss", rows=len(positions))
+    while len(memo) > int(get_setting("filter_memo_size", 16)):
+        memo.popitem(last=False)
+    return positions
+
 # --- 3. API & Helpers ---
+GOOGLE_BOOKS_API = "https://www.googleapis.com/books/v1/volumes"
+OPENBD_API = "https://api.openbd.jp/v1/get"
+
+@st.cache_resource
+def get_http_client():
+    """Pooled client (retries, backoff, per-provider circuit breakers) shared by all provider calls"""
+    return HttpClient(
+        timeout=get_setting("http_timeout", 5),
+        retries=get_setting("http_retries", 2),
+        failure_threshold=get_setting("circuit_failure_threshold", 5),
+        cooldown=get_setting("circuit_cooldown", 30),
+    )
+
+@st.cache_resource
+def get_lookup_executor():
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="lookup")
+
+@st.cache_resource
+def get_prefetch_executor():
+    # Prefetches block on route requests in the lookup pool, so they must never occupy it
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+@st.cache_resource
+def get_metadata_cache():
+    return MetadataCache(
+        get_setting("metadata_cache_path", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".booklog_metadata.sqlite3")),
+        ttl=get_setting("metadata_ttl", 30 * 86400),
+        negative_ttl=get_setting("metadata_negative_ttl", 86400),
+        max_entries=get_setting("metadata_max_entries", 5000),
+    )
+
+@timed("google.isbn")
+def _fetch_google_books(isbn):
+    """None = not found. Network/HTTP errors raise (and are not cached)."""
+    r = get_http_client().get("google", GOOGLE_BOOKS_API, params={"q": f"isbn:{isbn}"})
+    r.raise_for_status()
+    data = r.json()
+    if "items" not in data:
+        return None
+    info = data["items"][0]["volumeInfo"]
+    return {
+        "title": info.get("title", ""),
+        "author": info.get("authors", [""])[0],
+        "cover_url": info.get("imageLinks", {}).get("thumbnail", "")
+    }
+
+@timed("openbd.isbn")
+def _fetch_openbd(isbn):
+    r = get_http_client().get("openbd", OPENBD_API, params={"isbn": isbn})
+    r.raise_for_status()
+    data = r.json()
+    if not (data and data[0]):
+        return None
+    s = data[0]["summary"]
+    return {
+        "title": s.get("title", ""),
+        "author": s.get("author", ""),
+        "cover_url": s.get("cover", "")
+    }
+
 def get_google_books_data(isbn):
     try:
-        url = f"https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}"
-        r = requests.get(url, timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            if "items" in data:
-                info = data["items"][0]["volumeInfo"]
-                return {
-                    "title": info.get("title", ""),
-                    "author": info.get("authors", [""])[0],
-                    "cover_url": info.get("imageLinks", {}).get("thumbnail", "")
-                }
-    except: pass
-    return None
+        return get_metadata_cache().lookup("google", to_isbn13(isbn), lambda: _fetch_google_books(isbn))
+    except Exception:
+        return None  # counted in get_http_client().stats()
 
 def get_openbd_data(isbn):
     try:
-        r = requests.get(f"https://api.openbd.jp/v1/get?isbn={isbn}", timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            if data and data[0]:
-                s = data[0]["summary"]
-                return {
-                    "title": s.get("title", ""),
-                    "author": s.get("author", ""),
-                    "cover_url": s.get("cover", "")
-                }
-    except: pass
-    return None
+        return get_metadata_cache().lookup("openbd", to_isbn13(isbn), lambda: _fetch_openbd(isbn))
+    except Exception:
+        return None
 
 def get_amazon_image_url(isbn):
     """Generate Amazon Image URL from ISBN"""
-    isbn = str(isbn).replace('-', '').strip()
+    isbn = clean_isbn(isbn)
     if len(isbn) == 13:
         isbn10 = to_isbn10(isbn)
         if isbn10: return f"https://images-na.ssl-images-amazon.com/images/P/{isbn10}.09.LZZZZZZZ.jpg"
@@ -525,19 +693,52 @@ def resolve_best_image_url(isbn):
     # 3. Amazon
     return get_amazon_image_url(isbn)
 
-def fetch_book_info(isbn):
-    """Unified Fetcher for Auto-Search"""
-    data = None
-    
-    # 1. Try Google
-    g_data = get_google_books_data(isbn)
-    if g_data:
-        data = g_data
-    else:
-        # 2. Try OpenBD
-        o_data = get_openbd_data(isbn)
-        if o_data:
-            data = o_data
+# Priority order: when several providers answer, the earlier one wins
+BOOK_PROVIDERS = [get_google_books_data, get_openbd_data]
+
+def _is_complete(data):
+    return bool(data and data.get("title") and data.get("author"))
+
+@timed("fetch_book_info")
+def fetch_book_info(isbn, fill_wait=None):
+    """Unified Fetcher for Auto-Search.
+    All providers are queried at once; returns as soon as one gives title + author,
+    then waits up to `fill_wait` seconds for the others to fill missing fields (cover)."""
+    if fill_wait is None:
+        fill_wait = get_setting("lookup_fill_wait", 1.0)
+    executor = get_lookup_executor()
+    futures = {executor.submit(bind(provider), isbn): rank for rank, provider in enumerate(BOOK_PROVIDERS)}
+    results = {}
+    pending = set(futures)
+
+    # 1. First good result (or all providers finished); never wait past lookup_timeout
+    give_up = time.monotonic() + get_setting("lookup_timeout", 20)
+    while pending and not any(_is_complete(r) for r in results.values()):
+        done, pending = wait(pending, timeout=max(0, give_up - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done: break
+        for f in done:
+            results[futures[f]] = f.result()
+
+    # 2. Give slower providers a short window to fill fields the winner lacks
+    def _merged():
+        data = None
+        for rank in sorted(results, key=lambda r: (not _is_complete(results[r]), r)):
+            if not results[rank]: continue
+            if data is None:
+                data = dict(results[rank])
+            else:
+                for k, v in results[rank].items():
+                    if v and not data.get(k): data[k] = v
+        return data
+
+    deadline = time.monotonic() + fill_wait
+    data = _merged()
+    while pending and data and not data.get("cover_url"):
+        done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done: break
+        for f in done:
+            results[futures[f]] = f.result()
+        data = _merged()
 
     # If we found metadata but no cover, try Amazon fallback
     if data and not data.get("cover_url"):
@@ -545,130 +746,392 @@ def fetch_book_info(isbn):
          
     return data
 
-def search_books_by_title(query, start_index=0):
-    """Search books by title via Google Books API (Hybrid: Relevance + Newest)"""
-    url = "https://www.googleapis.com/books/v1/volumes"
-    results = []
-    debug_log = ""
+SEARCH_PAGE_SIZE = 20
+
+@timed("google.search")
+def _search_route(q, start_index):
+    params = {
+        "q": q,
+        "maxResults": SEARCH_PAGE_SIZE,
+        "startIndex": start_index,
+        "langRestrict": "ja",
+        "printType": "books",
+        "country": "JP",
+        "orderBy": "relevance"
+    }
+    r = get_http_client().get("google", GOOGLE_BOOKS_API, params=params)
+    r.raise_for_status()
+    return r.json().get("items", [])
+
+def _search_page(query, cursor):
+    """Fetch one page from both routes (concurrently) starting at `cursor`.
+    Returns (results, next_cursor, debug_log)."""
+    executor = get_lookup_executor()
+    # Route A: Specialized "Title" Search / Route B: Standard Relevance (Backup)
+    routes = [
+        executor.submit(bind(_search_route), f"intitle:{query}", cursor["title"]),
+        executor.submit(bind(_search_route), query, cursor["rel"]),
+    ]
     raw_items = []
-    
-    try:
-        # Route A: Specialized "Title" Search
-        params_title = {
-            "q": f"intitle:{query}",
-            "maxResults": 40,
-            "startIndex": start_index,
-            "langRestrict": "ja",
-            "printType": "books",
-            "country": "JP",
-            "orderBy": "relevance"
-        }
-        try:
-            r_title = requests.get(url, params=params_title, timeout=5)
-            if r_title.status_code == 200:
-                data = r_title.json()
-                if "items" in data: raw_items.extend(data["items"])
-        except: pass
-
-        # Route B: Standard Relevance (Backup)
-        params_rel = params_title.copy()
-        params_rel["q"] = query
+    debug_log = ""
+    for f in routes:
         try:
-            r_rel = requests.get(url, params=params_rel, timeout=5)
-            if r_rel.status_code == 200:
-                data = r_rel.json()
-                if "items" in data: raw_items.extend(data["items"])
-        except: pass
-
-        # Process & Deduplicate
-        unique_set = set()
-        raw_results = []
-        current_year = datetime.now().year
-        search_keywords = re.split(r'[ 　]+', query.strip().lower())
-        search_keywords = [k for k in search_keywords if k]
-
-        for item in raw_items:
-            info = item.get("volumeInfo", {})
-            title = info.get("title", "")
-            if not title: continue
-
-            # Year logic
-            pub_date = info.get("publishedDate", "")
-            year = int(pub_date[:4]) if pub_date and pub_date[:4].isdigit() else 0
-            if year < 1960: continue 
-
-            # Relevance Check
-            target_text = (title + " " + " ".join(info.get("authors", []))).lower()
-            matches_count = sum(1 for k in search_keywords if k in target_text)
-            if matches_count == 0: continue
-
-            # Deduplication
-            isbn = ""
-            for ident in info.get("industryIdentifiers", []):
-                if ident["type"] == "ISBN_13": isbn = ident["identifier"]
-                elif ident["type"] == "ISBN_10" and not isbn: isbn = ident["identifier"]
-                
-            key = f"{title}_{info.get('authors', [])}"
-            if key in unique_set: continue
-            unique_set.add(key)
-            
-            cover_url = info.get("imageLinks", {}).get("thumbnail", "")
-            if not cover_url and isbn:
-                cover_url = get_amazon_image_url(isbn)
+            raw_items.extend(f.result())
+        except Exception as e:
+            debug_log += f"Exception: {str(e)}"
+
+    # Process & Deduplicate (also against everything shown on earlier pages)
+    unique_set = set(cursor["seen"])
+    raw_results = []
+    search_keywords = re.split(r'[ 　]+', query.strip().lower())
+    search_keywords = [k for k in search_keywords if k]
+
+    for item in raw_items:
+        info = item.get("volumeInfo", {})
+        title = info.get("title", "")
+        if not title: continue
+
+        # Year logic
+        pub_date = info.get("publishedDate", "")
+        year = int(pub_date[:4]) if pub_date and pub_date[:4].isdigit() else 0
+        if year < 1960: continue 
+
+        # Relevance Check
+        target_text = (title + " " + " ".join(info.get("authors", []))).lower()
+        matches_count = sum(1 for k in search_keywords if k in target_text)
+        if matches_count == 0: continue
+
+        # Deduplication
+        isbn = ""
+        for ident in info.get("industryIdentifiers", []):
+            if ident["type"] == "ISBN_13": isbn = ident["identifier"]
+            elif ident["type"] == "ISBN_10" and not isbn: isbn = ident["identifier"]
             
-            raw_results.append({
-                "title": title,
-                "author": ", ".join(info.get("authors", ["Unknown"])),
-                "publisher": info.get("publisher", ""),
-                "publishedDate": f"{year}" if year else "",
-                "year": year,
-                "cover_url": cover_url,
-                "isbn": isbn,
-                "description": info.get("description", "")
-            })
+        key = f"{title}_{info.get('authors', [])}"
+        if key in unique_set: continue
+        unique_set.add(key)
+        
+        cover_url = info.get("imageLinks", {}).get("thumbnail", "")
+        if not cover_url and isbn:
+            cover_url = get_amazon_image_url(isbn)
         
-        # Simple Sort (Relevance by keyword match + Newest)
-        raw_results.sort(key=lambda x: (sum(1 for k in search_keywords if k in (x['title']+x['author']).lower()), x['year']), reverse=True)
-        results = raw_results
+        raw_results.append({
+            "title": title,
+            "author": ", ".join(info.get("authors", ["Unknown"])),
+            "publisher": info.get("publisher", ""),
+            "publishedDate": f"{year}" if year else "",
+            "year": year,
+            "cover_url": cover_url,
+            "isbn": isbn,
+            "description": info.get("description", "")
+        })
+    
+    # Simple Sort (Relevance by keyword match + Newest)
+    raw_results.sort(key=lambda x: (sum(1 for k in search_keywords if k in (x['title']+x['author']).lower()), x['year']), reverse=True)
+    next_cursor = {
+        "title": cursor["title"] + SEARCH_PAGE_SIZE,
+        "rel": cursor["rel"] + SEARCH_PAGE_SIZE,
+        "seen": frozenset(unique_set),
+    }
+    return raw_results, next_cursor, debug_log
+
+@st.cache_resource
+def get_search_pages():
+    """(query, page) -> Future of _search_page(), shared by all sessions (LRU)"""
+    return {"lock": threading.Lock(), "pages": OrderedDict()}
+
+def _get_search_page(query, page):
+    cache = get_search_pages()
+    key = (query, page)
+    with cache["lock"]:
+        fut = cache["pages"].get(key)
+        owner = fut is None
+        if owner:
+            fut = Future()
+            cache["pages"][key] = fut
+            while len(cache["pages"]) > 64:
+                cache["pages"].popitem(last=False)
+        else:
+            cache["pages"].move_to_end(key)
+    if owner:
+        result = None
+        try:
+            cursor = {"title": 0, "rel": 0, "seen": frozenset()} if page == 0 else _get_search_page(query, page - 1)[1]
+            result = _search_page(query, cursor)
+        except Exception as e:
+            fut.set_exception(e)
+        else:
+            fut.set_result(result)
+        if result is None or result[2]:
+            # Failed or partial (one route errored) pages are not kept
+            with cache["lock"]:
+                if cache["pages"].get(key) is fut:
+                    del cache["pages"][key]
+    return fut.result()
 
+def search_books_by_title(query, page=0):
+    """Search books by title via Google Books API (Hybrid: Title + Relevance routes).
+    Pages follow a cursor so they never overlap; the next page is prefetched in the background."""
+    try:
+        results, _, debug_log = _get_search_page(query, page)
     except Exception as e:
-        debug_log += f"Exception: {str(e)}"
-        
+        return [], f"Exception: {str(e)}"
+    get_prefetch_executor().submit(_get_search_page, query, page + 1)
     return results, debug_log
 
-# --- 4. UI Components ---
-PLACEHOLDER_IMG = "https://placehold.co/400x600/e0e0e0/999999?text=No+Image"
+# --- Cover Backfill ---
+def cover_candidates(row):
+    """Cover URL candidates for a book (a row of the typed snapshot), best first"""
+    urls = []
+    isbn = row.get("isbn", "")
+    title = row.get("title", "")
+    if isbn:
+        for data in (get_google_books_data(isbn), get_openbd_data(isbn)):
+            if data and data.get("cover_url"): urls.append(data["cover_url"])
+        urls.append(get_amazon_image_url(isbn))
+    elif title:
+        # Hand-entered book without ISBN: take thumbnails of search hits with the same title
+        author = row.get("author", "")
+        q = f"intitle:{title}" + (f" inauthor:{author}" if author else "")
+        try:
+            items = _search_route(q, 0)
+        except Exception:
+            items = []
+        for item in items:
+            info = item.get("volumeInfo", {})
+            if normalize_text(info.get("title", "")).startswith(normalize_text(title)):
+                urls.append(info.get("imageLinks", {}).get("thumbnail", ""))
+    return [u for u in dict.fromkeys(urls) if u]
 
-def render_book_card(row, is_mobile=False):
-    # Prepare Data
-    img_url = row['cover_url'] if row['cover_url'] and str(row['cover_url']) != 'nan' else PLACEHOLDER_IMG
-    
-    def safe_str(val):
-        s = str(val).strip()
-        return "" if s == 'nan' or s == 'None' else s
-
-    title = safe_str(row['title'])
-    author = safe_str(row['author'])
-    category = safe_str(row['category'])
-    status = safe_str(row['status'])
-    
-    tags_html = ""
-    if isinstance(row['tags'], str) and row['tags'] and safe_str(row['tags']):
-        tags = [t.strip() for t in row['tags'].split(',')]
-        tags_html = "".join([f"<span class='tag-badge'>{t}</span>" for t in tags])
-    
-    note_content = safe_str(row['notes'])
+def write_cover_urls(changes):
+    """Queue cover_url patches ({book_id: url}); the write-behind queue sends only those cells"""
+    queue = get_write_queue()
+    for book_id, url in changes.items():
+        queue.patch(book_id, {"cover_url": url})
+    get_books_cache().update(lambda df: apply_patches(df, {int(i): {"cover_url": u} for i, u in changes.items()}),
+                             carry=carry_patched(list(changes), ["cover_url"]))
+
+@st.cache_resource
+def get_cover_backfill():
+    _remove_public_file(os.path.join(COVER_DIR, "checks.sqlite3"))
+    return CoverBackfillWorker(
+        get_http_client(), get_books_cache().peek, cover_candidates, write_cover_urls,
+        db_path=get_setting("cover_checks_path", os.path.join(APP_DIR, ".booklog_cover_checks.sqlite3")),
+        rate=get_setting("cover_backfill_rate", 2.0),
+        interval=get_setting("cover_backfill_interval", 600),
+    )
+
+# --- Bulk Import ---
+OPENBD_BATCH_SIZE = 100   # ISBNs per OpenBD /v1/get request
+WRITE_CHUNK_ROWS = 500    # rows per append request
+
+def parse_isbn_list(text):
+    """ISBN-13s found in pasted text / CSV content (order kept, deduplicated) + invalid tokens"""
+    isbns, invalid, seen = [], [], set()
+    for token in re.findall(r'[0-9][0-9\-]{8,15}[0-9Xx]', text):
+        isbn = canonical_isbn(token)
+        if not isbn:
+            invalid.append(token)
+        elif isbn not in seen:
+            seen.add(isbn)
+            isbns.append(isbn)
+    return isbns, invalid
+
+@timed("openbd.batch")
+def _fetch_openbd_batch(isbns):
+    """One OpenBD request for many ISBNs -> {isbn: data or None}"""
+    r = get_http_client().get("openbd", OPENBD_API, params={"isbn": ",".join(isbns)}, timeout=15)
+    r.raise_for_status()
+    out = {}
+    for isbn, item in zip(isbns, r.json()):
+        s = item.get("summary") if item else None
+        out[isbn] = {"title": s.get("title", ""), "author": s.get("author", ""), "cover_url": s.get("cover", "")} if s else None
+    return out
+
+def resolve_isbns_bulk(isbns, progress=None):
+    """{isbn: data or None}: OpenBD in batches, Google (concurrent, rate limited) only for misses"""
+    cache = get_metadata_cache()
+    results, todo = {}, []
+    for isbn in isbns:
+        cached = cache.get("openbd", isbn)
+        if cached is MISSING:
+            todo.append(isbn)
+        else:
+            results[isbn] = cached
+
+    # 1. OpenBD batches
+    for i in range(0, len(todo), OPENBD_BATCH_SIZE):
+        chunk = todo[i:i + OPENBD_BATCH_SIZE]
+        try:
+            for isbn, data in _fetch_openbd_batch(chunk).items():
+                cache.put("openbd", isbn, data)
+                results[isbn] = data
+        except Exception:
+            pass  # whole batch falls through to Google
+        if progress: progress(min(i + OPENBD_BATCH_SIZE, len(todo)) / max(len(isbns), 1) * 0.5, "OpenBD で検索中...")
+
+    # 2. Google Books fallback for misses
+    misses = [isbn for isbn in isbns if not _is_complete(results.get(isbn))]
+    limiter = RateLimiter(get_setting("google_rate_limit", 5))
+    futures, finished = {}, 0
+    def _collect(done):
+        nonlocal finished
+        for f in done:
+            isbn = futures.pop(f)
+            g_data = f.result()
+            if g_data:
+                base = results.get(isbn) or {}
+                results[isbn] = {k: base.get(k) or g_data.get(k, "") for k in ("title", "author", "cover_url")}
+            finished += 1
+            if progress: progress(0.5 + finished / len(misses) * 0.3, f"Google Books で補完中... ({finished}/{len(misses)})")
+    for isbn in misses:
+        # Wait for the rate limit here, not inside the task: the lookup pool is shared with
+        # interactive lookups, so its workers must never sleep on the limiter
+        limiter.acquire()
+        futures[get_lookup_executor().submit(bind(get_google_books_data), isbn)] = isbn
+        _collect([f for f in futures if f.done()])
+    _collect(as_completed(list(futures)))
+    return {isbn: results.get(isbn) for isbn in isbns}
+
+def add_books_bulk(books, progress=None):
+    """Append many books in chunked writes. Returns (written_count, error or None)."""
+    storage = get_storage()
+    books_df = get_books()
+    if books_df.attrs.get("load_error"):
+        return 0, f"蔵書データを読み込めませんでした: {books_df.attrs['load_error']}"
+    max_id = int(books_df['id'].max()) if not books_df.empty else 0
+    next_id = max(max_id, get_write_queue().max_id()) + 1
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [dict(book, id=next_id + i, created_at=now) for i, book in enumerate(books)]
+    if not rows:
+        return 0, None
+
+    if books_df.empty and len(storage.read_books().columns) == 0:
+        # No header yet (checked against storage, not the snapshot) -> one full write
+        storage.replace_books(pd.DataFrame(rows, columns=BOOK_COLUMNS))
+        invalidate_books()
+        return len(rows), None
+
+    written, error = 0, None
+    columns = [c for c in books_df.columns if c != TAG_LIST]
+    for i in range(0, len(rows), WRITE_CHUNK_ROWS):
+        try:
+            storage.insert_books(rows[i:i + WRITE_CHUNK_ROWS], columns)
+        except Exception as e:
+            error = str(e)
+            break
+        written = min(i + WRITE_CHUNK_ROWS, len(rows))
+        if progress: progress(0.8 + written / len(rows) * 0.2, f"書き込み中... ({written}/{len(rows)})")
+    if written:
+        new_df = typed_books(pd.DataFrame(rows[:written]))
+        get_books_cache().update(lambda df: concat_books([new_df, df]), carry=carry_inserted(new_df))
+    return written, error
+
+# --- Shelf Scan ---
+@st.cache_resource
+def get_scan_pool():
+    """Process pool for decoding the tiles of a shelf photo (None = decode in-process)"""
+    workers = int(get_setting("scan_workers", min(4, os.cpu_count() or 1)))
+    if workers <= 1:
+        return None
+    # spawn: forking the threaded Streamlit server is not safe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def scan_shelf_photo(photo_bytes, df):
+    """Queue entries for every new ISBN in a shelf photo, metadata resolved in one concurrent pass"""
+    isbns = decode_all_isbns(photo_bytes, get_scan_pool())
+    queued = {item["isbn"] for item in st.session_state.get("shelf_queue", [])}
+    new = [i for i in isbns if find_registered(i, df) is None and i not in queued]
+    resolved = resolve_isbns_bulk(new) if new else {}
+    items = []
+    for isbn in new:
+        data = resolved.get(isbn) or {}
+        items.append({
+            "登録": bool(data.get("title")), "isbn": isbn, "title": data.get("title", ""),
+            "author": data.get("author", ""), "cover_url": data.get("cover_url") or get_amazon_image_url(isbn),
+        })
+    return isbns, items
+
+# Thumbnails live under ./static so Streamlit serves them at app/static/covers/ (server.enableStaticServing)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+COVER_DIR = os.path.join(APP_DIR, "static", "covers")
+
+def _remove_public_file(path):
+    """Delete a database that older versions kept in the served static folder"""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+@st.cache_resource
+def get_cover_executor():
+    # Cover downloads get their own workers so a page of slow hosts never queues ahead of ISBN lookups
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="cover")
+
+@st.cache_resource
+def get_cover_cache():
+    # The index must not live in COVER_DIR: everything there is publicly served
+    _remove_public_file(os.path.join(COVER_DIR, "index.sqlite3"))
+    return CoverCache(COVER_DIR, get_setting("cover_index_path", os.path.join(APP_DIR, ".booklog_covers.sqlite3")),
+                      get_http_client(), get_cover_executor(),
+                      max_bytes=get_setting("cover_cache_max_mb", 200) * 1024 * 1024)
+
+def _cover_digest(url):
+    """Digest of the local thumbnail, "placeholder", or None while the download is pending"""
+    cache = get_cover_cache()
+    # Snapshot cells are already "" when empty (schema.typed_books); API results may give None
+    url = (url or "").strip()
+    if url:
+        state, digest = cache.lookup(url)
+        if state == "hit": return digest
+        if state == "pending": return None
+    cache.placeholder()
+    return "placeholder"
+
+def cover_src(url):
+    """<img> src for a cover: local WebP thumbnail once cached, the remote URL until then"""
+    digest = _cover_digest(url)
+    if digest is None:
+        return url
+    if get_setting("cover_serve_mode", "static") == "data_uri":
+        with open(get_cover_cache().path_for(digest), "rb") as f:
+            return "data:image/webp;base64," + base64.b64encode(f.read()).decode("ascii")
+    return f"app/static/covers/{digest}.webp"
+
+def cover_image(url):
+    """Same as cover_src() but for st.image (local file path)"""
+    digest = _cover_digest(url)
+    return url if digest is None else get_cover_cache().path_for(digest)
+
+def card_html(row, grid=False):
+    """HTML of one glass card. grid=True: lazy image + edit button for the card_grid component."""
+    # Empty cells are already "" (schema.typed_books), so no 'nan' / 'None' checks here
+    # Attribute-escaped: cover_url comes straight from the sheet
+    img_url = html.escape(cover_src(row['cover_url']), quote=True)
+    title = html.escape(row['title'])
+    author = html.escape(row['author'])
+    category = html.escape(row['category'])
+    status = html.escape(row['status'])
+    tags_html = "".join(f"<span class='tag-badge'>{html.escape(t)}</span>" for t in row[TAG_LIST])
+    note_content = html.escape(row['notes'])
     note_html = ""
     if note_content:
         note_html = f"<div class='note-box'>📝 {note_content}</div>"
     else:
         note_html = "<div style='margin-top:10px; opacity:0.6; font-size:0.8rem;'>（メモなし）</div>"
 
+    if grid:
+        img_tag = f'<img data-src="{img_url}" class="glass-card-img" loading="lazy">'
+        button = f'<button class="card-edit-btn" data-edit-id="{int(row["id"])}">編集</button>'
+    else:
+        img_tag, button = f'<img src="{img_url}" class="glass-card-img">', ""
+
     # Glass Card HTML
-    card_html = f"""
+    return f"""
     <div class="glass-card">
         <div class="glass-card-img-box">
-            <img src="{img_url}" class="glass-card-img">
+            {img_tag}
         </div>
         <div class="glass-card-content">
             <div class="glass-card-title">{title}</div>
@@ -681,8 +1144,12 @@ def render_book_card(row, is_mobile=False):
             {note_html}
         </div>
     </div>
+    {button}
     """
-    st.markdown(card_html, unsafe_allow_html=True)
+
+def render_book_card(row, is_mobile=False):
+    """One st.markdown + one st.button per book (card_renderer = "cards")"""
+    st.markdown(card_html(row), unsafe_allow_html=True)
     
     # Edit Button
     btn_key = f"edit_{row['id']}_{'m' if is_mobile else 'p'}"
@@ -690,6 +1157,77 @@ def render_book_card(row, is_mobile=False):
         st.session_state["edit_target"] = row['id']
         st.rerun()
 
+_card_grid = components.declare_component(
+    "card_grid", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "card_grid")
+)
+
+def render_card_grid(rows, key):
+    """All cards in one component payload; returns the id whose 編集 was clicked (once), else None"""
+    payload = "".join(card_html(row, grid=True) for _, row in rows.iterrows())
+    event = _card_grid(html=payload, key=key, default=None)
+    # The component keeps returning its last value on later reruns: act on each click once
+    if event and event.get("nonce") != st.session_state.get(f"{key}_nonce"):
+        st.session_state[f"{key}_nonce"] = event["nonce"]
+        return event["id"]
+    return None
+
+@timed("render.book_list")
+def render_book_list(page_df, categories, view):
+    """Cards of the current page; the book being edited is shown as a form in its place"""
+    edit_id = st.session_state.get("edit_target")
+    if get_setting("card_renderer", "grid") != "grid":
+        for idx, row in page_df.iterrows():
+            if edit_id == row['id']:
+                render_edit_form(row, categories, key_suffix=view)
+            else:
+                render_book_card(row, is_mobile=view == "mob")
+        return
+
+    positions = np.flatnonzero(page_df['id'].to_numpy() == edit_id) if edit_id is not None else []
+    if len(positions):
+        pos = positions[0]
+        segments = [page_df.iloc[:pos], page_df.iloc[pos + 1:]]
+    else:
+        segments = [page_df]
+    clicked = None
+    for n, segment in enumerate(segments):
+        if n == 1:
+            render_edit_form(page_df.iloc[pos], categories, key_suffix=view)
+        if not segment.empty:
+            clicked = render_card_grid(segment, f"card_grid_{view}_{n}") or clicked
+    if clicked is not None:
+        st.session_state["edit_target"] = clicked
+        st.rerun()
+
+def _set_page(key, page):
+    st.session_state[key] = page
+
+def paginate(df, positions, view, filter_state):
+    """Current page (rows of `df` at `positions`) for this view. Only the page's rows are
+    copied. Page number lives in session_state and goes back to the first page whenever
+    the filter inputs change."""
+    page_size = max(1, int(get_setting("page_size", 20)))
+    page_key, sig_key = f"page_{view}", f"page_filter_{view}"
+    if st.session_state.get(sig_key) != filter_state:
+        st.session_state[sig_key] = filter_state
+        st.session_state[page_key] = 0
+    total_pages = max(1, -(-len(positions) // page_size))
+    page = min(st.session_state.get(page_key, 0), total_pages - 1)  # list may have shrunk (delete)
+    st.session_state[page_key] = page
+    return df.iloc[positions[page * page_size:(page + 1) * page_size]], page, total_pages
+
+def render_pager(view, page, total_pages):
+    if total_pages <= 1:
+        return
+    page_key = f"page_{view}"
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← 前へ", key=f"prev_{view}", disabled=page == 0, on_click=_set_page, args=(page_key, page - 1))
+    with col2:
+        st.markdown(f"<div style='text-align:center; padding-top:8px;'>{page + 1} / {total_pages} ページ</div>", unsafe_allow_html=True)
+    with col3:
+        st.button("次へ →", key=f"next_{view}", disabled=page >= total_pages - 1, on_click=_set_page, args=(page_key, page + 1))
+
 def render_preview_card(isbn, categories, key_suffix):
     if "preview_data" in st.session_state and st.session_state["preview_data"]:
         data = st.session_state["preview_data"]
@@ -697,27 +1235,74 @@ def render_preview_card(isbn, categories, key_suffix):
         
         col1, col2 = st.columns([1, 3])
         with col1:
-            img_url = data.get("cover_url") if data.get("cover_url") else PLACEHOLDER_IMG
             try:
-                st.image(img_url, width=100)
+                st.image(cover_image(data.get("cover_url")), width=100)
             except:
-                st.image(PLACEHOLDER_IMG, width=100)
+                st.image(cover_image(None), width=100)
         with col2:
             st.markdown(f"**{data['title']}**")
             st.caption(f"著者: {data['author']}")
+            dup_id = find_registered(isbn) if isbn else None
+            if dup_id is not None:
+                st.warning(f"⚠️ この本は登録済みです (ID: {dup_id})")
             
             with st.form(key=f"confirm_add_{key_suffix}"):
                 c_cat = st.selectbox("カテゴリ", categories)
                 c_status = st.selectbox("状態", ["未読", "読書中", "読了"])
                 c_point = st.text_area("ポイント", height=100)
+                c_dup = dup_id is not None and st.checkbox("重複して登録する")
                 
                 if st.form_submit_button("この本を登録する"):
-                    if add_book(data['title'], data['author'], c_cat, "", c_status, c_point, data['cover_url'], "", isbn):
+                    if add_book(data['title'], data['author'], c_cat, "", c_status, c_point, data['cover_url'], "", isbn,
+                                allow_duplicate=c_dup):
                         st.success("登録しました")
                         del st.session_state["preview_data"]
                         time.sleep(1)
                         st.rerun()
 
+def show_scanned_isbn(isbn, categories, key_suffix):
+    st.success(f"ISBN: {isbn}")
+    info = fetch_book_info(isbn)
+    if info:
+        st.session_state["preview_data"] = info
+        render_preview_card(isbn, categories, key_suffix)
+
+@st.fragment(run_every=0.5)
+def _watch_live_scan():
+    """Poll the scanner in a fragment; the whole page reruns only once an ISBN is confirmed"""
+    scanner = st.session_state.get("live_scanner")
+    if scanner is not None and scanner.result and st.session_state.get("live_isbn") != scanner.result:
+        st.session_state["live_isbn"] = scanner.result
+        st.rerun(scope="app")
+
+def render_live_scanner(categories):
+    """Camera stream decoded in a worker thread (video_scan.LiveScanner)"""
+    isbn = st.session_state.get("live_isbn")
+    if isbn:
+        show_scanned_isbn(isbn, categories, "mob_live")
+        if st.button("🔄 次の本を読み取る", key="live_next"):
+            del st.session_state["live_isbn"]
+            st.session_state.pop("live_scanner", None)
+            st.rerun()
+        return
+
+    scanner = st.session_state.get("live_scanner")
+    if scanner is None or scanner.done:
+        scanner = LiveScanner(int(get_setting("live_confirm_frames", 3)))
+        st.session_state["live_scanner"] = scanner
+
+    def on_frame(frame):
+        # Runs on the WebRTC thread: hand the frame over and return immediately
+        scanner.submit(frame.to_ndarray(format="gray"))
+        return frame
+
+    webrtc_streamer(
+        key="live_scan", mode=WebRtcMode.SENDRECV, video_frame_callback=on_frame, async_processing=True,
+        media_stream_constraints={"video": {"facingMode": "environment"}, "audio": False},
+    )
+    st.caption("バーコードを枠内に写すと自動で読み取ります")
+    _watch_live_scan()
+
 def render_edit_form(row, categories, key_suffix):
     with st.form(key=f"edit_form_{row['id']}_{key_suffix}"):
         st.markdown(f"#### 編集: {row['title']}")
@@ -730,7 +1315,7 @@ def render_edit_form(row, categories, key_suffix):
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.form_submit_button("保存"):
-                update_book(row['id'], e_title, e_author, e_cat, row['tags'], e_status, e_notes, row['read_date'])
+                update_book(row['id'], e_title, e_author, e_cat, row['tags'], e_status, e_notes, cell_str('read_date', row['read_date']))
                 st.session_state["edit_target"] = None
                 st.rerun()
         with col2:
@@ -741,8 +1326,7 @@ def render_edit_form(row, categories, key_suffix):
             if st.form_submit_button("削除", type="primary"):
                 delete_book(row['id'])
                 st.session_state["edit_target"] = None
-                st.success("削除しました")
-                time.sleep(1)
+                st.toast("削除しました")
                 st.rerun()
 
 def render_add_book_form(categories, key_suffix):
@@ -752,8 +1336,16 @@ def render_add_book_form(categories, key_suffix):
         n_author = st.text_input("著者")
         n_cat = st.selectbox("カテゴリ", categories)
         n_status = st.selectbox("状態", ["未読", "読書中", "読了"])
+        n_force = st.checkbox("似た本があっても登録する")
         
         if st.form_submit_button("登録"):
+            similar = [] if n_force else find_similar_books(n_title, n_author)
+            if similar:
+                books = get_books()
+                titles = dict(zip(books['id'], books['title']))
+                st.warning("⚠️ 似た本が登録済みです:\n" + "\n".join(
+                    f"- {titles.get(i, '')} (ID: {i}, 類似度 {score:.0%})" for i, score in similar))
+                return
             c_url = ""
             if n_isbn:
                 c_url = resolve_best_image_url(n_isbn)
@@ -763,6 +1355,110 @@ def render_add_book_form(categories, key_suffix):
                 time.sleep(1)
                 st.rerun()
 
+def render_bulk_import(df, categories):
+    with st.form(key="bulk_import"):
+        b_text = st.text_area("ISBNリスト（改行・カンマ区切り）", height=150)
+        b_file = st.file_uploader("またはCSVファイル", type=["csv", "txt"])
+        b_cat = st.selectbox("カテゴリ", categories)
+        b_status = st.selectbox("状態", ["未読", "読書中", "読了"])
+        skip_registered = st.checkbox("登録済みのISBNはスキップ", value=True)
+        submitted = st.form_submit_button("一括登録")
+    if not submitted:
+        return
+
+    text = b_text or ""
+    if b_file is not None:
+        try:
+            # Plain ISBN lists have no header: only treat the first line as one when it names an ISBN column
+            csv_df = pd.read_csv(b_file, dtype=str, header=None)
+            isbn_cols = [c for c in csv_df.columns if "isbn" in str(csv_df.at[0, c]).lower()]
+            if isbn_cols:
+                csv_df = csv_df.iloc[1:][isbn_cols]
+            text += "\n" + "\n".join(csv_df.fillna("").astype(str).values.ravel())
+        except Exception:
+            b_file.seek(0)
+            text += "\n" + b_file.read().decode("utf-8", errors="ignore")
+    isbns, invalid = parse_isbn_list(text)
+    failures = [{"isbn": t, "reason": "ISBNとして不正"} for t in invalid]
+    if skip_registered and not df.empty:
+        skipped = [i for i in isbns if find_registered(i, df) is not None]
+        isbns = [i for i in isbns if find_registered(i, df) is None]
+        failures += [{"isbn": i, "reason": "登録済み"} for i in skipped]
+    if not isbns:
+        st.warning("登録できるISBNがありません")
+    else:
+        bar = st.progress(0.0, text=f"{len(isbns)}件を検索中...")
+        progress = lambda frac, msg: bar.progress(min(frac, 1.0), text=msg)
+        resolved = resolve_isbns_bulk(isbns, progress)
+        books = []
+        for isbn in isbns:
+            data = resolved.get(isbn)
+            if not data or not data.get("title"):
+                failures.append({"isbn": isbn, "reason": "書誌情報が見つかりません"})
+                continue
+            books.append({
+                "title": data["title"], "author": data.get("author", ""), "category": b_cat, "tags": "",
+                "status": b_status, "notes": "", "cover_url": data.get("cover_url") or get_amazon_image_url(isbn),
+                "read_date": "", "isbn": isbn,
+            })
+        written, error = add_books_bulk(books, progress)
+        bar.progress(1.0, text="完了")
+        failures += [{"isbn": b["isbn"], "reason": f"書き込み失敗: {error}"} for b in books[written:]]
+        if written:
+            st.success(f"{written}冊を登録しました")
+    if failures:
+        st.warning(f"{len(failures)}件は登録されませんでした")
+        st.dataframe(pd.DataFrame(failures), use_container_width=True, hide_index=True)
+
+def render_shelf_scan(df, categories):
+    """Decode every barcode in a photo of several books, review, then register in one write"""
+    photo = st.file_uploader("本を並べた写真 (裏表紙のバーコードが写るように)", type=["jpg", "jpeg", "png"], key="shelf_photo")
+    if photo is not None and st.session_state.get("shelf_photo_done") != photo.file_id:
+        with st.spinner("バーコードを読み取り中..."):
+            try:
+                isbns, items = scan_shelf_photo(photo.getvalue(), df)
+            except Exception:
+                isbns, items = [], []
+        st.session_state["shelf_photo_done"] = photo.file_id
+        st.session_state.setdefault("shelf_queue", []).extend(items)
+        if isbns:
+            st.success(f"{len(isbns)}件のISBNを検出 (新規 {len(items)}件)")
+        else:
+            st.error("読み取れませんでした")
+
+    queue = st.session_state.get("shelf_queue", [])
+    if not queue:
+        return
+    edited = st.data_editor(
+        pd.DataFrame(queue), key="shelf_editor", hide_index=True, use_container_width=True,
+        column_order=["登録", "title", "author", "isbn"], disabled=["isbn"],
+    )
+    c1, c2 = st.columns(2)
+    s_cat = c1.selectbox("カテゴリ", categories, key="shelf_cat")
+    s_status = c2.selectbox("状態", ["未読", "読書中", "読了"], key="shelf_status")
+    selected = edited[edited["登録"] & (edited["title"].astype(str).str.strip() != "")]
+    c1, c2 = st.columns(2)
+    if c1.button(f"選択した{len(selected)}冊を登録", type="primary", disabled=selected.empty, key="shelf_add"):
+        books = [{
+            "title": r["title"], "author": r["author"], "category": s_cat, "tags": "", "status": s_status,
+            "notes": "", "cover_url": r["cover_url"], "read_date": "", "isbn": r["isbn"],
+        } for r in selected.to_dict("records")]
+        written, error = add_books_bulk(books)
+        if written:
+            done = {b["isbn"] for b in books[:written]}
+            st.session_state["shelf_queue"] = [item for item in queue if item["isbn"] not in done]
+            st.session_state.pop("shelf_editor", None)
+            st.toast(f"{written}冊を登録しました")
+        if error:
+            st.error(f"{len(books) - written}冊の書き込みに失敗しました: {error}")
+        else:
+            st.rerun()
+    if c2.button("キューを空にする", key="shelf_clear"):
+        st.session_state["shelf_queue"] = []
+        st.session_state.pop("shelf_editor", None)
+        st.rerun()
+
+@timed("ui.pc")
 def draw_pc_ui(df, categories):
     """Render PC Exclusive UI"""
     # Logo
@@ -794,7 +1490,7 @@ def draw_pc_ui(df, categories):
         
         if "last_fetched_key" not in st.session_state or st.session_state["last_fetched_key"] != current_key:
             with st.spinner(f"検索中... (Page {st.session_state['search_page'] + 1})"):
-                clean_input = search_input.replace("-", "").strip()
+                clean_input = clean_isbn(search_input)
                 if clean_input.isdigit() and (len(clean_input) == 10 or len(clean_input) == 13):
                     info = fetch_book_info(clean_input)
                     if info:
@@ -806,8 +1502,7 @@ def draw_pc_ui(df, categories):
                         st.sidebar.warning("見つかりませんでした")
                         st.session_state["preview_data"] = None
                 else:
-                    start_idx = st.session_state["search_page"] * 20
-                    candidates, debug_msg = search_books_by_title(search_input, start_index=start_idx)
+                    candidates, debug_msg = search_books_by_title(search_input, page=st.session_state["search_page"])
                     if candidates:
                         st.session_state["candidate_list"] = candidates
                         st.session_state["preview_data"] = None
@@ -842,12 +1537,18 @@ def draw_pc_ui(df, categories):
         for i, book in enumerate(candidates):
             with cols[i % 5]:
                  # ... Render Candidate ...
-                 img_src = book.get("cover_url") if book.get("cover_url") else PLACEHOLDER_IMG
-                 st.image(img_src, caption=book['title'][:20], use_container_width=True)
+                 st.image(cover_image(book.get("cover_url")), caption=book['title'][:20], use_container_width=True)
                  if st.button("選択", key=f"sel_cand_{i}", use_container_width=True):
                     st.session_state["preview_data"] = book
                     st.session_state["candidate_list"] = None
                     st.rerun()
+        col_prev, _, col_next = st.columns([1, 3, 1])
+        with col_prev:
+            st.button("← 前のページ", key="search_prev", disabled=st.session_state["search_page"] == 0,
+                      on_click=_set_page, args=("search_page", st.session_state["search_page"] - 1))
+        with col_next:
+            st.button("次のページ →", key="search_next",
+                      on_click=_set_page, args=("search_page", st.session_state["search_page"] + 1))
         st.markdown("---")
 
     # Display Preview
@@ -863,25 +1564,29 @@ def draw_pc_ui(df, categories):
     cat_filter = st.sidebar.multiselect("カテゴリ", categories, key="pc_cat_filter")
     
     # Filter Logic
-    filtered = df.copy()
-    if search_q:
-        filtered = filtered[filtered.apply(lambda r: search_q in str(r.values), axis=1)]
-    if cat_filter:
-        filtered = filtered[filtered['category'].isin(cat_filter)]
+    positions = filter_positions(df, "pc", search_q, cat_filter)
     
     # Main Content
-    st.markdown(f"# 蔵書一覧 ({len(filtered)}冊)")
+    st.markdown(f"# 蔵書一覧 ({len(positions)}冊)")
     
-    for idx, row in filtered.iterrows():
-        if st.session_state.get("edit_target") == row['id']:
-            render_edit_form(row, categories, key_suffix="pc")
-        else:
-            render_book_card(row, is_mobile=False)
+    page_df, page, total_pages = paginate(df, positions, "pc", (search_q, tuple(cat_filter)))
+    render_book_list(page_df, categories, "pc")
+    render_pager("pc", page, total_pages)
             
     # PC: Manual Add (Collapsed)
     with st.expander("➕ 手動登録フォーム"):
         render_add_book_form(categories, key_suffix="pc")
+    with st.expander("📥 一括登録 (ISBNリスト / CSV)"):
+        render_bulk_import(df, categories)
+    with st.expander("🧹 重複候補チェック"):
+        if st.button("重複候補を検出", key="dup_report"):
+            report = duplicate_report(df)
+            if report.empty:
+                st.success("重複候補はありません")
+            else:
+                st.dataframe(report, use_container_width=True, hide_index=True)
 
+@timed("ui.mobile")
 def draw_mobile_ui(df, categories):
     """Render Mobile Exclusive UI"""
     st.markdown("### 📱 蔵書一覧")
@@ -889,24 +1594,26 @@ def draw_mobile_ui(df, categories):
     # 1. Mobile: Camera Scanner (TOP PRIORITY)
     st.markdown("#### 📷 バーコード読取")
     show_camera = st.checkbox("カメラを起動する", key="toggle_camera")
+    live = show_camera and WEBRTC_AVAILABLE and st.toggle("ライブスキャン (シャッター不要)", value=True, key="live_mode")
+    if not live and "live_scanner" in st.session_state:
+        st.session_state.pop("live_scanner").stop()
     
-    if show_camera and PYZBAR_AVAILABLE:
+    if live:
+        render_live_scanner(categories)
+    elif show_camera:
         img_file = st.camera_input("バーコードを写してください", key="mob_cam")
         if img_file:
             try:
-                img = Image.open(img_file)
-                decoded = decode(img)
-                if decoded:
-                    isbn = decoded[0].data.decode('utf-8')
-                    st.success(f"ISBN: {isbn}")
-                    info = fetch_book_info(isbn)
-                    if info:
-                        st.session_state["preview_data"] = info
-                        render_preview_card(isbn, categories, "mob_cam")
-            except:
+                isbn, _ = decode_isbn(img_file.getvalue())
+            except Exception:
+                isbn = None
+            if isbn:
+                show_scanned_isbn(isbn, categories, "mob_cam")
+            else:
                 st.error("読み取れませんでした")
-    elif show_camera and not PYZBAR_AVAILABLE:
-        st.warning("⚠️ バーコード読取ライブラリ(zbar)が見つかりません。")
+    
+    with st.expander("📚 まとめて読取 (複数冊)"):
+        render_shelf_scan(df, categories)
     
     # 2. Results / List
     st.markdown("---")
@@ -915,35 +1622,104 @@ def draw_mobile_ui(df, categories):
         m_search = st.text_input("キーワード", key="mob_search")
         m_cat = st.selectbox("カテゴリ", ["すべて"] + categories, key="mob_cat")
     
-    filtered = df.copy()
-    if m_search:
-        filtered = filtered[filtered.apply(lambda r: m_search in str(r.values), axis=1)]
-    if m_cat != "すべて":
-        filtered = filtered[filtered['category'] == m_cat]
+    positions = filter_positions(df, "mob", m_search, () if m_cat == "すべて" else (m_cat,))
 
-    st.caption(f"{len(filtered)} 冊")
+    st.caption(f"{len(positions)} 冊")
     
-    for idx, row in filtered.iterrows():
-        if st.session_state.get("edit_target") == row['id']:
-            render_edit_form(row, categories, key_suffix="mob")
-        else:
-            render_book_card(row, is_mobile=True)
+    page_df, page, total_pages = paginate(df, positions, "mob", (m_search, m_cat))
+    render_book_list(page_df, categories, "mob")
+    render_pager("mob", page, total_pages)
             
     with st.expander("➕ 手動登録"):
         render_add_book_form(categories, key_suffix="mob")
 
 
+def render_pending_writes():
+    """Sidebar indicator for edits waiting in the write-behind queue"""
+    q_stats = get_write_queue().stats()
+    if q_stats["pending"]:
+        st.caption(f"⏳ 保存待ちの変更: {q_stats['pending']}件")
+        if st.button("今すぐ保存", key="flush_pending_writes"):
+            if get_write_queue().flush():
+                st.toast("保存しました")
+    if q_stats["last_error"]:
+        st.warning(f"保存に失敗しました（自動で再試行します）: {q_stats['last_error']}")
+
+# --- Profiler ---
+PROFILE_ATTRS_SKIP = {"name", "start_ms", "ms", "depth", "thread", "error"}
+
+def start_profile():
+    """Trace this rerun when the sidebar profiler toggle is on (no-op spans otherwise)"""
+    if not st.session_state.get("profiler_on"):
+        profiler.stop()
+        return None
+    session = st.session_state.setdefault("profile_session", os.urandom(4).hex())
+    return profiler.start("rerun", session=session)
+
+def render_profiler_panel(trace):
+    """Waterfall of this rerun's spans in the sidebar; the trace is also appended to the profile log"""
+    if trace is None or profiler.current() is not trace:
+        return
+    profiler.stop()
+    log_path = get_setting("profile_log", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile.jsonl"))
+    if log_path:
+        try:
+            profiler.write_jsonl(log_path, trace)
+        except OSError:
+            log_path = None
+    total = max(trace.total_ms, 0.001)
+    lines = []
+    for row in trace.rows():
+        attrs = " ".join(f"{k}={v}" for k, v in row.items() if k not in PROFILE_ATTRS_SKIP)
+        color = "#ff6b6b" if row["error"] else ("#8ab4f8" if row["thread"] == threading.current_thread().name else "#f6c177")
+        left = row["start_ms"] / total * 100
+        width = max(row["ms"] / total * 100, 0.5)
+        lines.append(
+            f'<div style="font-size:11px;margin:2px 0" title="{html.escape(row["error"] or attrs)}">'
+            f'<div style="padding-left:{row["depth"] * 8}px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis">'
+            f'{html.escape(row["name"])} <span style="opacity:.6">{html.escape(attrs)}</span> <b>{row["ms"]:.1f}ms</b></div>'
+            f'<div style="position:relative;height:6px;background:rgba(255,255,255,.08)">'
+            f'<div style="position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:6px;background:{color}"></div></div></div>'
+        )
+    with st.sidebar.expander(f"⏱️ プロファイル: {trace.total_ms:.0f}ms", expanded=True):
+        st.markdown("".join(lines) or "span なし", unsafe_allow_html=True)
+        st.caption("青 = スクリプト / 橙 = ワーカースレッド / 赤 = エラー"
+                   + (f" ・ログ: {os.path.basename(log_path)}" if log_path else ""))
+
+
+# Client-side probe: reports window.innerWidth once per session (see components/viewport_probe)
+_viewport_probe = components.declare_component(
+    "viewport_probe", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "viewport_probe"))
+MOBILE_BREAKPOINT = 768  # same as the @media rules above
+
+def detect_device():
+    """'pc' / 'mobile' once the probe has answered, None on the very first render"""
+    if "viewport_width" not in st.session_state:
+        width = _viewport_probe(key="viewport_probe", default=None)
+        if not width:
+            return None
+        st.session_state["viewport_width"] = width
+    return "mobile" if st.session_state["viewport_width"] < MOBILE_BREAKPOINT else "pc"
+
+
 # --- Main Application Logic ---
 def main():
+    trace = start_profile()
     try:
         df = get_books()
     except Exception as e:
         st.error(f"Data Load Error: {e}")
         df = pd.DataFrame()
+    if df.attrs.get("load_error"):
+        st.error(f"Data Load Error: {df.attrs['load_error']}")
+        st.button("🔄 再読み込み", key="retry_load")  # the click reruns, which retries the load
 
     categories = get_categories()
-    
-    categories = get_categories()
+    # Versions this rerun renders; _watch_snapshot_versions reruns once they move on
+    # A failed load isn't the shared snapshot (version None): take the current versions, or the
+    # watcher would rerun (and re-read storage) every sync_interval until the load succeeds
+    seen = (get_books_cache().version_of(df), get_categories_cache().version_of(categories))
+    st.session_state["seen_versions"] = tuple(cur if v is None else v for v, cur in zip(seen, snapshot_versions()))
     
     # --- Robust View Control (Sidebar) ---
     # Defined HERE in main scope so it's available for logic below
@@ -951,26 +1727,52 @@ def main():
         st.markdown("---")
         with st.expander("🖥️ Display Mode", expanded=False):
             view_mode = st.radio("表示モード", ["Auto (自動)", "PC固定", "スマホ固定"], index=0, key="view_mode_main_selector")
+            c_stats = get_books_cache().stats()
+            st.caption(f"📦 Cache v{c_stats['version']} / hit {c_stats['hits']} / miss {c_stats['misses']} "
+                       f"(shared {c_stats['coalesced']} / stale {c_stats['stale_hits']})")
+            m_stats = get_metadata_cache().stats()
+            st.caption(f"🔖 ISBN cache {m_stats['entries']}件 / hit率 {m_stats['hit_rate']:.0%} (not found {m_stats['negative_hits']})")
+            cv_stats = get_cover_cache().stats()
+            st.caption(f"🖼️ Covers {cv_stats['files']}件 / {cv_stats['bytes'] / 1e6:.1f}MB (dead {cv_stats['dead']})")
+            if get_setting("cover_backfill", True):
+                bf_stats = get_cover_backfill().stats()
+                st.caption(f"🩹 表紙チェック {bf_stats['checked']}件 / 補完 {bf_stats['fixed']}件 (last {bf_stats['last_run'] or '-'})")
+            for name, p_stats in get_http_client().stats().items():
+                st.caption(f"🌐 {name}: {p_stats['state']} / {p_stats['requests']} req / "
+                           f"err {p_stats['errors']} / avg {p_stats['latency_avg'] * 1000:.0f}ms")
+            st.toggle("⏱️ プロファイラ", key="profiler_on", help="再実行ごとの処理時間をサイドバーに表示し、profile.jsonl に記録します")
+        render_pending_writes()
         st.sidebar.markdown("---")
 
+    # Auto: build only the layout for the detected device.
+    # Until the probe answers (first render) both are built and CSS hides one.
+    device = detect_device() if view_mode == "Auto (自動)" else None
+    use_css_fallback = view_mode == "Auto (自動)" and device is None
+    show_pc = view_mode == "PC固定" or device == "pc" or use_css_fallback
+    show_mobile = view_mode == "スマホ固定" or device == "mobile" or use_css_fallback
+
     # Render based on selection
     # 1. PC UI
-    if view_mode in ["Auto (自動)", "PC固定"]:
+    if show_pc:
         with st.container():
             # Marker for CSS visibility control (Only active in Auto mode)
-            if view_mode == "Auto (自動)":
+            if use_css_fallback:
                 st.markdown('<div class="pc-view-marker"></div>', unsafe_allow_html=True)
             
             draw_pc_ui(df, categories)
 
     # 2. Mobile UI
-    if view_mode in ["Auto (自動)", "スマホ固定"]:
+    if show_mobile:
         with st.container():
             # Marker for CSS visibility control (Only active in Auto mode)
-            if view_mode == "Auto (自動)":
+            if use_css_fallback:
                 st.markdown('<div class="mobile-view-marker"></div>', unsafe_allow_html=True)
                 
             draw_mobile_ui(df, categories)
 
+    if get_setting("sync_interval", 10):
+        _watch_snapshot_versions()
+    render_profiler_panel(trace)
+
 if __name__ == "__main__":
     main()
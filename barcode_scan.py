@@ -0,0 +1,169 @@
+"""Barcode decoding pipeline for camera frames.
+
+Phone photos are large and mostly not barcode, so instead of handing the
+full frame to the decoder we:
+
+1. decode to grayscale and downscale to `target_width` for localization
+2. find the region with the strongest horizontal gradient (bars) and crop it
+   from the full-resolution frame, so thin bars survive
+3. decode only EAN-13 and keep 978/979 codes (printed ISBNs are always EAN-13
+   "Bookland" codes; the 192... code printed under them is not an ISBN)
+4. retry with binarization / a 90° rotation only when that fails
+
+For shelf photos, `decode_all_isbns()` splits a high-resolution image into
+overlapping tiles (optionally decoded in a process pool) and collects every
+ISBN found.
+
+pyzbar is used when the zbar library is installed; otherwise OpenCV's
+built-in barcode detector is used.
+"""
+import cv2
+import numpy as np
+
+from isbn_utils import ISBN_PREFIXES, is_valid_isbn13
+
+try:
+    from pyzbar.pyzbar import decode as zbar_decode, ZBarSymbol
+    ZBAR_AVAILABLE = True
+except ImportError:
+    ZBAR_AVAILABLE = False
+
+TARGET_WIDTH = 640
+ROI_MAX_WIDTH = 800
+TILE_SIZE = 1600
+TILE_OVERLAP = 0.2  # a barcode cut by one tile edge is whole in the neighbour
+MAX_REGIONS = 12
+ROI_PAD = 0.15  # grow the crop by this fraction on each side (quiet zone)
+
+_cv_detector = None
+
+
+def to_gray(image):
+    """Grayscale uint8 array from bytes, a file-like object, a PIL image or an array"""
+    if hasattr(image, "read"):
+        image = image.read()
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        gray = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("not an image")
+        return gray
+    arr = np.asarray(image.convert("L") if hasattr(image, "convert") else image)
+    if arr.ndim == 3:
+        arr = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY if arr.shape[2] == 3 else cv2.COLOR_RGBA2GRAY)
+    return np.ascontiguousarray(arr, dtype=np.uint8)
+
+
+def downscale(gray, width=TARGET_WIDTH):
+    h, w = gray.shape[:2]
+    if w <= width:
+        return gray
+    return cv2.resize(gray, (width, round(h * width / w)), interpolation=cv2.INTER_AREA)
+
+
+def barcode_regions(gray, limit=1):
+    """Bounding boxes (x, y, w, h) of bar-like regions, strongest first"""
+    gx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3)
+    grad = cv2.convertScaleAbs(cv2.subtract(cv2.convertScaleAbs(gx), cv2.convertScaleAbs(gy)))
+    grad = cv2.blur(grad, (9, 9))
+    _, mask = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (21, 7)))
+    mask = cv2.dilate(cv2.erode(mask, None, iterations=4), None, iterations=4)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for c in contours:
+        x, y, w, h = cv2.boundingRect(c)
+        if w < 40 or h < 15:
+            continue
+        boxes.append((int(grad[y:y + h, x:x + w].sum()), (x, y, w, h)))
+    boxes.sort(reverse=True)
+    return [b for _, b in boxes[:limit]]
+
+
+def crop(gray, box, scale=1.0, pad=ROI_PAD):
+    """Crop `box` (found on an image `scale` times smaller) out of `gray`, padded"""
+    x, y, w, h = (int(v * scale) for v in box)
+    px, py = int(w * pad) + 8, int(h * pad) + 8
+    H, W = gray.shape[:2]
+    return downscale(gray[max(0, y - py):min(H, y + h + py), max(0, x - px):min(W, x + w + px)], ROI_MAX_WIDTH)
+
+
+def decode_ean13(gray):
+    """All valid EAN-13 codes found in a grayscale image (order kept, deduplicated)"""
+    if ZBAR_AVAILABLE:
+        codes = [d.data.decode("ascii", "ignore") for d in zbar_decode(gray, symbols=[ZBarSymbol.EAN13])]
+    else:
+        global _cv_detector
+        if _cv_detector is None:
+            _cv_detector = cv2.barcode.BarcodeDetector()
+        ok, infos, types, _ = _cv_detector.detectAndDecodeWithType(gray)
+        codes = [c for c, t in zip(infos, types) if t == "EAN_13"] if ok else []
+    # An ISBN-13 is an EAN-13, so the same checksum applies
+    return list(dict.fromkeys(c for c in codes if is_valid_isbn13(c)))
+
+
+def _binarize(gray):
+    return cv2.threshold(cv2.GaussianBlur(gray, (3, 3), 0), 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+
+
+def decode_isbn(image, target_width=TARGET_WIDTH, retries=True):
+    """(ISBN-13 or None, name of the step that succeeded). Cheap steps first.
+    retries=False stops after the ROI attempt (live video: the next frame is the retry)."""
+    gray = to_gray(image)
+    small = downscale(gray, target_width)
+    scale = gray.shape[1] / small.shape[1]
+    box = next(iter(barcode_regions(small)), None)
+    roi = crop(gray, box, scale) if box else downscale(gray, ROI_MAX_WIDTH)
+
+    attempts = [("roi", lambda: roi), ("roi_otsu", lambda: _binarize(roi))]
+    if box is not None:
+        attempts.append(("full", lambda: downscale(gray, ROI_MAX_WIDTH * 2)))
+    attempts.append(("rot90", lambda: _rotated_roi(gray, small, scale)))
+    if not retries:
+        attempts = attempts[:1]
+    for name, make in attempts:
+        # Japanese books print a second EAN-13 (192... classification / price) under the ISBN:
+        # only Bookland codes count, otherwise keep trying (the next step may see the ISBN)
+        codes = [c for c in decode_ean13(make()) if c.startswith(ISBN_PREFIXES)]
+        if codes:
+            return codes[0], name
+    return None, None
+
+
+def _rotated_roi(gray, small, scale):
+    # Vertical barcodes: rotate and look for bars again
+    rotated = cv2.rotate(small, cv2.ROTATE_90_CLOCKWISE)
+    box = next(iter(barcode_regions(rotated)), None)
+    if box is None:
+        return rotated
+    return crop(cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE), box, scale)
+
+
+def tiles(gray, size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Overlapping size x size tiles covering the image (the image itself if it is small)"""
+    H, W = gray.shape[:2]
+    step = int(size * (1 - overlap))
+    ys = range(0, max(H - size, 0) + step, step) if H > size else [0]
+    xs = range(0, max(W - size, 0) + step, step) if W > size else [0]
+    return [np.ascontiguousarray(gray[y:y + size, x:x + size]) for y in ys for x in xs]
+
+
+def decode_tile(tile):
+    """Every EAN-13 in one tile: each bar-like region separately, then the tile as a whole"""
+    small = downscale(tile, TARGET_WIDTH)
+    scale = tile.shape[1] / small.shape[1]
+    codes = []
+    for box in barcode_regions(small, limit=MAX_REGIONS):
+        roi = crop(tile, box, scale)
+        codes += decode_ean13(roi) or decode_ean13(_binarize(roi))
+    codes += decode_ean13(downscale(tile, ROI_MAX_WIDTH * 2))
+    return codes
+
+
+def decode_all_isbns(image, executor=None):
+    """All distinct ISBN-13s (978/979 prefix) in a shelf photo, in tile order.
+    `executor` (e.g. a ProcessPoolExecutor) decodes the tiles in parallel."""
+    parts = tiles(to_gray(image))
+    results = executor.map(decode_tile, parts) if executor is not None and len(parts) > 1 else map(decode_tile, parts)
+    found = [c for codes in results for c in codes if c.startswith(ISBN_PREFIXES)]
+    return list(dict.fromkeys(found))
@@ -0,0 +1,11 @@
+"""Offline benchmarks for BookLog (run from the repo root: python -m benchmarks.<name>)."""
+import warnings
+
+import streamlit
+from streamlit import config, logger
+
+# app.py is imported outside `streamlit run` (bare mode); keep its warnings out of the results
+config.get_option("logger.level")
+config.set_option("logger.level", "error")
+logger.set_log_level("error")
+warnings.filterwarnings("ignore", category=FutureWarning)
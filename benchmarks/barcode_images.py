@@ -0,0 +1,144 @@
+"""Synthetic EAN-13 "phone photos" for the barcode benchmarks.
+
+Each image is a barcode label pasted onto a busy background (text-like
+stripes, noise), then rotated, blurred, unevenly lit and JPEG-compressed the
+way a handheld camera frame would be.
+"""
+import random
+
+import cv2
+import numpy as np
+
+L_CODES = ["0001101", "0011001", "0010011", "0111101", "0100011",
+           "0110001", "0101111", "0111011", "0110111", "0001011"]
+PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+          "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def ean13_checksum(body):
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+    return str((10 - total % 10) % 10)
+
+
+def random_isbn(rnd):
+    body = "978" + "".join(rnd.choice("0123456789") for _ in range(9))
+    return body + ean13_checksum(body)
+
+
+def ean13_modules(code):
+    """95 modules as a string of 0/1 (1 = bar)"""
+    r_codes = ["".join("1" if b == "0" else "0" for b in c) for c in L_CODES]
+    g_codes = [c[::-1] for c in r_codes]
+    left = "".join(L_CODES[int(d)] if p == "L" else g_codes[int(d)]
+                   for d, p in zip(code[1:7], PARITY[int(code[0])]))
+    right = "".join(r_codes[int(d)] for d in code[7:])
+    return "101" + left + "01010" + right + "101"
+
+
+def render_ean13(code, module_px=3, height_modules=50, quiet_modules=11):
+    """White label with the barcode, as a grayscale uint8 array"""
+    bars = np.array([m == "1" for m in ean13_modules(code)])
+    row = np.concatenate([np.zeros(quiet_modules, bool), bars, np.zeros(quiet_modules, bool)])
+    row = np.repeat(np.where(row, 0, 255).astype(np.uint8), module_px)
+    label = np.tile(row, (height_modules * module_px, 1))
+    margin = 4 * module_px
+    return cv2.copyMakeBorder(label, margin, margin * 3, 0, 0, cv2.BORDER_CONSTANT, value=255)
+
+
+def background(rnd, size):
+    w, h = size
+    rng = np.random.default_rng(rnd.randrange(2 ** 32))
+    img = np.full((h, w), rnd.randint(120, 220), np.uint8)
+    for _ in range(rnd.randint(20, 60)):  # "text lines" and blocks of a cover
+        x, y = rnd.randrange(w), rnd.randrange(h)
+        cv2.rectangle(img, (x, y), (x + rnd.randint(20, w // 2), y + rnd.randint(4, 40)),
+                      rnd.randint(0, 255), -1)
+    noise = rng.normal(0, 8, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def make_photo(code, rnd, size=(1920, 2560), hard=False):
+    """JPEG bytes of a synthetic camera frame containing one EAN-13"""
+    w, h = size
+    img = background(rnd, size)
+    label = render_ean13(code, module_px=rnd.randint(3, 7))
+    lh, lw = label.shape
+    x, y = rnd.randrange(0, w - lw), rnd.randrange(0, h - lh)
+    img[y:y + lh, x:x + lw] = label
+
+    angle = rnd.uniform(-8, 8) + (90 if rnd.random() < 0.15 else 0)
+    m = cv2.getRotationMatrix2D((x + lw / 2, y + lh / 2), angle, 1.0)
+    img = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REFLECT)
+
+    sigma = rnd.uniform(0.5, 4.0 if hard else 2.5)
+    img = cv2.GaussianBlur(img, (0, 0), sigma)
+    light = np.linspace(rnd.uniform(0.45, 1.0), rnd.uniform(0.8, 1.2), w)[None, :]
+    img = np.clip(img * light + rnd.uniform(-30, 30), 0, 255).astype(np.uint8)
+    ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, rnd.randint(70, 92)])
+    return jpg.tobytes()
+
+
+def corpus(n, seed=0, size=(1920, 2560)):
+    """[(expected_isbn, jpeg_bytes)]"""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        code = random_isbn(rnd)
+        out.append((code, make_photo(code, rnd, size, hard=i % 4 == 3)))
+    return out
+
+
+def make_shelf_photo(codes, rnd, size=(4032, 3024)):
+    """JPEG bytes of a high-resolution photo with one label per code laid out in a rough grid"""
+    w, h = size
+    img = background(rnd, size)
+    cols = max(1, int(len(codes) ** 0.5 * w / h + 0.5))
+    rows = -(-len(codes) // cols)
+    cw, ch = w // cols, h // rows
+    for i, code in enumerate(codes):
+        label = render_ean13(code, module_px=rnd.randint(3, 4))
+        lh, lw = label.shape
+        cx, cy = (i % cols) * cw, (i // cols) * ch
+        x = cx + rnd.randrange(0, max(cw - lw, 1))
+        y = cy + rnd.randrange(0, max(ch - lh, 1))
+        img[y:y + lh, x:x + lw] = label[:h - y, :w - x]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), rnd.uniform(-3, 3), 1.0)
+    img = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REFLECT)
+    img = cv2.GaussianBlur(img, (0, 0), rnd.uniform(0.5, 1.2))
+    ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return jpg.tobytes()
+
+
+def shelf_corpus(n, per_photo=12, seed=0, size=(4032, 3024)):
+    """[(expected_isbns, jpeg_bytes)]; one in five codes is a non-ISBN EAN-13"""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        codes = [random_isbn(rnd) for _ in range(per_photo)]
+        for i in range(0, per_photo, 5):
+            body = "45" + "".join(rnd.choice("0123456789") for _ in range(10))  # JAN product code
+            codes[i] = body + ean13_checksum(body)
+        out.append(([c for c in codes if c.startswith(("978", "979"))], make_shelf_photo(codes, rnd, size)))
+    return out
+
+
+def write_scan_video(code, path, seed=0, frames=90, fps=30, size=(640, 480)):
+    """MJPEG .avi of a handheld scan: out of focus at first, then steadier and sharper"""
+    rnd = random.Random(seed)
+    w, h = size
+    base = background(rnd, (w * 2, h * 2))
+    label = render_ean13(code, module_px=3)
+    lh, lw = label.shape
+    base[h - lh // 2:h - lh // 2 + lh, w - lw // 2:w - lw // 2 + lw] = label
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    for i in range(frames):
+        focus = max(0.0, 1 - i / (frames * 0.5))  # 1 = blurry, 0 = in focus
+        shake = 2 + 30 * focus
+        cx, cy = w + rnd.uniform(-shake, shake), h + rnd.uniform(-shake, shake)
+        m = cv2.getRotationMatrix2D((cx, cy), rnd.uniform(-4, 4) * (0.3 + focus), 1.0)
+        m[:, 2] += (w / 2 - cx, h / 2 - cy)
+        frame = cv2.warpAffine(base, m, size, borderMode=cv2.BORDER_REFLECT)
+        frame = cv2.GaussianBlur(frame, (0, 0), 0.6 + 5 * focus + rnd.uniform(0, 0.6))
+        out.write(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+    out.release()
+    return path
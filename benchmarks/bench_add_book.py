@@ -0,0 +1,59 @@
+"""Insert latency of add_book(): append path vs. full-sheet overwrite.
+
+    python -m benchmarks.bench_add_book [--latency 0.0] [--inserts 20]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import app
+from benchmarks.fake_sheets import FakeSheetsConnection, ReadOnlyClientConnection
+
+SIZES = [100, 1_000, 10_000, 50_000]
+
+
+def make_books(n):
+    return pd.DataFrame({
+        "id": range(1, n + 1),
+        "title": [f"Book {i}" for i in range(n)],
+        "author": [f"Author {i % 500}" for i in range(n)],
+        "category": ["技術書"] * n,
+        "tags": [""] * n,
+        "status": ["未読"] * n,
+        "notes": [""] * n,
+        "cover_url": [""] * n,
+        "read_date": [""] * n,
+        "isbn": [f"978{i:010d}" for i in range(n)],
+        "created_at": ["2024-01-01 00:00:00"] * n,
+    })
+
+
+def time_inserts(conn_cls, n, inserts, latency):
+    conn = conn_cls(latency=latency)
+    conn.load("books", make_books(n))
+    app.get_conn = lambda: conn
+    app.get_books_cache.clear()
+    app.get_books()  # warm the snapshot like a running session would
+    start = time.perf_counter()
+    for i in range(inserts):
+        app.add_book(f"New {i}", "Bench", "技術書", "", "未読", "", "", "", "")
+    elapsed = (time.perf_counter() - start) / inserts
+    return elapsed * 1000, conn.calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per API call")
+    parser.add_argument("--inserts", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} | {'append ms/insert':>17} | {'overwrite ms/insert':>20} | append-path API calls")
+    for n in SIZES:
+        append_ms, append_calls = time_inserts(FakeSheetsConnection, n, args.inserts, args.latency)
+        overwrite_ms, _ = time_inserts(ReadOnlyClientConnection, n, args.inserts, args.latency)
+        print(f"{n:>8} | {append_ms:>17.2f} | {overwrite_ms:>20.2f} | {append_calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Barcode decoding: preprocessing pipeline vs. decoding the full camera frame.
+
+Uses a synthetic EAN-13 corpus, or real photos with `--images DIR` (the
+expected ISBN-13 must appear in each file name, e.g. 9784003101018.jpg).
+
+    python -m benchmarks.bench_barcode [--count 60] [--images DIR]
+"""
+import argparse
+import collections
+import io
+import os
+import re
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import barcode_scan
+from benchmarks.barcode_images import corpus
+
+
+def naive_decode(data):
+    """What draw_mobile_ui used to do: full-resolution frame, every symbology"""
+    img = Image.open(io.BytesIO(data))
+    if barcode_scan.ZBAR_AVAILABLE:
+        found = barcode_scan.zbar_decode(img)
+        return found[0].data.decode("utf-8") if found else None
+    gray = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2GRAY)
+    ok, infos, _, _ = cv2.barcode.BarcodeDetector().detectAndDecodeWithType(gray)
+    return infos[0] if ok and infos else None
+
+
+def pipeline_decode(data):
+    return barcode_scan.decode_isbn(data)[0]
+
+
+def load_images(directory):
+    out = []
+    for name in sorted(os.listdir(directory)):
+        m = re.search(r"97[89]\d{10}", name)
+        if m:
+            with open(os.path.join(directory, name), "rb") as f:
+                out.append((m.group(0), f.read()))
+    return out
+
+
+def run(images, fn):
+    ok, times = 0, []
+    for expected, data in images:
+        start = time.perf_counter()
+        got = fn(data)
+        times.append((time.perf_counter() - start) * 1000)
+        ok += got == expected
+    times.sort()
+    return ok / len(images), sum(times) / len(times), times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--images", help="directory of real photos named after their ISBN")
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else corpus(args.count)
+    backend = "pyzbar" if barcode_scan.ZBAR_AVAILABLE else "opencv"
+    print(f"{len(images)} images, decoder: {backend}")
+    print(f"{'method':<10} {'decoded':>8} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, fn in [("full", naive_decode), ("pipeline", pipeline_decode)]:
+        rate, avg, p50, p95 = run(images, fn)
+        print(f"{name:<10} {rate:>7.0%} {avg:>8.1f} {p50:>8.1f} {p95:>8.1f}")
+
+    steps = collections.Counter(barcode_scan.decode_isbn(data)[1] for _, data in images)
+    print("pipeline steps:", ", ".join(f"{k or 'failed'}={v}" for k, v in steps.most_common()))
+
+
+if __name__ == "__main__":
+    main()
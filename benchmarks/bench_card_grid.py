@@ -0,0 +1,70 @@
+"""Book list rendering: one card_grid component payload vs. st.markdown + st.button per card.
+
+Runs draw_pc_ui() under Streamlit's AppTest with every book on one page and
+reports the rerun time and the number of elements sent to the browser.
+
+    python -m benchmarks.bench_card_grid [--sizes 500 5000] [--runs 3]
+"""
+import argparse
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def _page(rows, renderer):
+    # Executed by AppTest as the page script (source is copied, so imports live inside)
+    import os
+    import sys
+    sys.path.insert(0, os.getcwd())
+    import benchmarks  # noqa: F401  (quiet logs)
+    import app
+    from benchmarks.bench_add_book import make_books
+    from benchmarks.fake_sheets import FakeSheetsConnection
+
+    if getattr(app, "_bench_rows", None) != rows:
+        conn = FakeSheetsConnection()
+        conn.load("books", make_books(rows))
+        app.get_conn = lambda: conn
+        app.get_books_cache.clear()
+        app._bench_rows = rows
+    settings = {"page_size": rows, "card_renderer": renderer, "cover_serve_mode": "data_uri",
+                "write_journal_path": os.path.join(os.environ.get("TMPDIR", "/tmp"), "bench_journal.jsonl")}
+    app.get_setting = lambda name, default=None: settings.get(name, default)
+    app.draw_pc_ui(app.get_books(), ["技術書"])
+
+
+def count_elements(node):
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return sum(count_elements(c) for c in children.values())
+
+
+def measure(rows, renderer, runs):
+    at = AppTest.from_function(_page, args=(rows, renderer), default_timeout=600)
+    at.run()  # warm-up: builds the snapshot, search index and cover cache
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return min(times), count_elements(at.main)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'books':>6} {'renderer':<8} {'rerun ms':>9} {'elements':>9}")
+    for rows in args.sizes:
+        for renderer in ("cards", "grid"):
+            seconds, elements = measure(rows, renderer, args.runs)
+            print(f"{rows:>6} {renderer:<8} {seconds * 1000:>9.0f} {elements:>9}")
+
+
+if __name__ == "__main__":
+    main()
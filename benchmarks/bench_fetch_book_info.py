@@ -0,0 +1,63 @@
+"""fetch_book_info(): concurrent providers vs. the old Google-then-OpenBD sequence,
+against local stub servers with injected latencies.
+
+    python -m benchmarks.bench_fetch_book_info [--lookups 10]
+"""
+import argparse
+import itertools
+import tempfile
+import time
+
+import app
+from benchmarks.stub_servers import StubBooksServer
+from metadata_cache import MetadataCache
+
+SCENARIOS = [
+    ("both fast", dict(google_latency=0.05, openbd_latency=0.05)),
+    ("google slow", dict(google_latency=0.8, openbd_latency=0.05)),
+    ("google slow + not found", dict(google_latency=0.8, openbd_latency=0.05, google_found=False)),
+    ("google no cover", dict(google_latency=0.05, openbd_latency=0.3, google_cover=False)),
+]
+
+_isbns = (f"978{n:010d}" for n in itertools.count(4000000000))
+
+
+def sequential_fetch(isbn):
+    """The previous fetch_book_info(): Google first, OpenBD only if Google has nothing"""
+    data = app.get_google_books_data(isbn) or app.get_openbd_data(isbn)
+    if data and not data.get("cover_url"):
+        data["cover_url"] = app.get_amazon_image_url(isbn)
+    return data
+
+
+def time_lookups(fn, lookups):
+    start = time.perf_counter()
+    covers = 0
+    for _ in range(lookups):
+        data = fn(next(_isbns))  # fresh ISBN each time -> no metadata cache hits
+        if data and "amazon" not in data.get("cover_url", ""):
+            covers += 1
+    return (time.perf_counter() - start) * 1000 / lookups, covers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    cache = MetadataCache(f"{tmp}/metadata.sqlite3")
+    app.get_metadata_cache = lambda: cache
+
+    print(f"{'scenario':<26} | {'sequential ms':>13} | {'concurrent ms':>13} | provider covers (seq/conc)")
+    for name, latency in SCENARIOS:
+        with StubBooksServer(**latency) as stub:
+            app.GOOGLE_BOOKS_API = stub.google_url
+            app.OPENBD_API = stub.openbd_url
+            seq_ms, seq_covers = time_lookups(sequential_fetch, args.lookups)
+            conc_ms, conc_covers = time_lookups(app.fetch_book_info, args.lookups)
+        print(f"{name:<26} | {seq_ms:>13.1f} | {conc_ms:>13.1f} | {seq_covers}/{conc_covers} of {args.lookups}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Rerun cost of the book list when the filters did not change (memoized vs. recomputed).
+
+Runs draw_pc_ui() under AppTest with a keyword + category filter set, reruns
+it without touching the inputs (like opening an edit form), and compares
+filter_memo_size = 16 with 0 (memo disabled).
+
+    python -m benchmarks.bench_filter_memo [--rows 50000] [--runs 5]
+"""
+import argparse
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def _page(rows, memo_size):
+    import os
+    import sys
+    sys.path.insert(0, os.getcwd())
+    import benchmarks  # noqa: F401  (quiet logs)
+    import app
+    from benchmarks.bench_search import make_books
+    from benchmarks.fake_sheets import FakeSheetsConnection
+
+    if getattr(app, "_bench_rows", None) != rows:
+        conn = FakeSheetsConnection()
+        books = make_books(rows)
+        books["category"] = ["技術書", "小説", "ビジネス", "その他"] * (rows // 4) + ["その他"] * (rows % 4)
+        for col in ("status", "read_date", "isbn"):
+            books[col] = ""
+        conn.load("books", books)
+        app.get_conn = lambda: conn
+        app.get_books_cache.clear()
+        app._bench_rows = rows
+    settings = {"filter_memo_size": memo_size, "cover_serve_mode": "data_uri",
+                "write_journal_path": os.path.join(os.environ.get("TMPDIR", "/tmp"), "bench_journal.jsonl")}
+    app.get_setting = lambda name, default=None: settings.get(name, default)
+    app.draw_pc_ui(app.get_books(), ["技術書", "小説", "ビジネス", "その他"])
+
+
+def measure(rows, memo_size, runs):
+    at = AppTest.from_function(_page, args=(rows, memo_size), default_timeout=600)
+    at.run()
+    at.sidebar.text_input(key="pc_search").input("データ")
+    at.sidebar.multiselect(key="pc_cat_filter").select("技術書").select("小説")
+    at.run()  # first filtered run: fills the memo
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.rows} books, unchanged filter (keyword + 2 categories), median of {args.runs} reruns")
+    for label, size in (("recomputed", 0), ("memoized", 16)):
+        print(f"{label:<11} {measure(args.rows, size, args.runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Near-duplicate titles: MinHash/LSH index vs. pairwise difflib.
+
+Planted duplicates are width variants (full-width ASCII, half-width kana),
+added subtitles and spacing/punctuation changes of existing titles.
+
+    python -m benchmarks.bench_fuzzy_dupes [--rows 20000] [--dupes 500]
+"""
+import argparse
+import difflib
+import random
+import time
+
+from benchmarks.bench_search import AUTHORS, WORDS
+from fuzzy_dupes import DuplicateFinder
+
+SUBTITLES = ["―より良いコードを書くための実践テクニック", ": A Practical Guide", "(第2版)", "〜はじめての人のために〜"]
+KANJI = "本書道学論史話記集海空山川星花猫犬鳥春夏秋冬風雪月光影夢恋愛心命時代国家人生世界戦争平和経済技術科学"
+KANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモラリルレロ"
+HALF_KANA = str.maketrans("アイウエオカキクケコサシスセソタチツテトナニヌネノ", "ｱｲｳｴｵｶｷｸｹｺｻｼｽｾｿﾀﾁﾂﾃﾄﾅﾆﾇﾈﾉ")
+
+
+def variant(title, rnd):
+    kind = rnd.randrange(4)
+    if kind == 0:  # full-width ASCII
+        return "".join(chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c for c in title)
+    if kind == 1:
+        return title.translate(HALF_KANA)
+    if kind == 2:
+        return title + " " + rnd.choice(SUBTITLES)
+    return title.replace(" ", "・")
+
+
+def make_titles(n, rnd):
+    """Mostly distinct titles: a vocabulary word plus a random kanji/kana phrase"""
+    def phrase():
+        pool = rnd.choice([KANJI, KANA])
+        return "".join(rnd.choice(pool) for _ in range(rnd.randint(2, 6)))
+    return [f"{rnd.choice(WORDS)} {phrase()}{rnd.choice(['', 'の', 'と'])}{phrase()}" for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dupes", type=int, default=500)
+    parser.add_argument("--difflib-sample", type=int, default=300)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    titles = make_titles(args.rows, rnd)
+    authors = [rnd.choice(AUTHORS) for _ in range(args.rows)]
+    originals = rnd.sample(range(args.rows), args.dupes)
+    planted = {}
+    for n, i in enumerate(originals):
+        new_id = args.rows + n + 1
+        titles.append(variant(titles[i], rnd))
+        authors.append(authors[i])
+        planted[new_id] = i + 1
+    ids = list(range(1, len(titles) + 1))
+    print(f"{len(titles)} titles, {args.dupes} planted duplicates")
+
+    # difflib: every new title against every registered one; time a sample, extrapolate to n^2/2
+    sample = titles[:args.difflib_sample]
+    start = time.perf_counter()
+    for n, a in enumerate(sample):
+        for b in sample[n + 1:]:
+            difflib.SequenceMatcher(None, a, b).ratio()
+    per_pair = (time.perf_counter() - start) / (len(sample) * (len(sample) - 1) / 2)
+    total_pairs = len(titles) * (len(titles) - 1) / 2
+    print(f"difflib pairwise   ~{per_pair * total_pairs:8.0f} s for a full report (extrapolated), "
+          f"~{per_pair * len(titles) * 1000:.0f} ms per insert")
+
+    finder = DuplicateFinder()
+    start = time.perf_counter()
+    for i, t, a in zip(ids, titles, authors):
+        finder.add(i, t, a)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    pairs = finder.report()
+    report_s = time.perf_counter() - start
+    found = {(a, b) for a, b, _ in pairs}
+    hits = sum((planted[d], d) in found for d in planted)
+    print(f"MinHash/LSH        build {build:6.2f} s, report {report_s:6.2f} s, "
+          f"{len(pairs)} pairs, planted recall {hits / len(planted):.0%}")
+
+    queries = [(titles[d - 1], authors[d - 1]) for d in list(planted)[:200]]
+    start = time.perf_counter()
+    for t, a in queries:
+        finder.query(t, a)
+    print(f"query on insert    {(time.perf_counter() - start) / len(queries) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""ISBN column normalization (NumPy vs. per-row Python) and duplicate lookup
+(IsbnIndex vs. scanning the books frame).
+
+    python -m benchmarks.bench_isbn [--rows 50000]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from isbn_utils import IsbnIndex, canonical_isbn, isbn13_column, to_isbn10
+
+
+def make_isbns(n, seed=0):
+    """Mixed spellings as they show up in the sheet: ISBN-13, ISBN-10, hyphens, '.0', blanks"""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        body = "978" + "".join(rnd.choice("0123456789") for _ in range(9))
+        isbn = body + str((10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body)) % 10) % 10)
+        out.append(rnd.choice([isbn, isbn, to_isbn10(isbn), f"{isbn[:3]}-{isbn[3:]}", isbn + ".0", ""]))
+    return out
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    isbns = make_isbns(args.rows)
+    df = pd.DataFrame({"id": range(1, args.rows + 1), "isbn": isbns})
+    print(f"{args.rows} rows")
+
+    loop, loop_ms = timed(lambda: [canonical_isbn(v) for v in isbns])
+    vec, vec_ms = timed(lambda: isbn13_column(isbns), repeat=5)
+    assert list(vec) == loop
+    print(f"normalize column   per-row {loop_ms:8.1f} ms   numpy {vec_ms:8.1f} ms")
+
+    queries = random.Random(1).sample([v for v in loop if v], args.lookups)
+    def scan(isbn):
+        # What a duplicate check without an index has to do
+        return df.index[df["isbn"].map(canonical_isbn) == isbn]
+    _, scan_ms = timed(lambda: scan(queries[0]), repeat=3)
+    index, build_ms = timed(lambda: IsbnIndex.from_frame(df))
+    _, get_ms = timed(lambda: [index.get(q) for q in queries])
+    print(f"duplicate check    scan {scan_ms:8.2f} ms/lookup   index {get_ms / len(queries) * 1000:8.2f} µs/lookup"
+          f"   (index build {build_ms:.1f} ms, once per snapshot)")
+
+
+if __name__ == "__main__":
+    main()
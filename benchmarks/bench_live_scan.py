@@ -0,0 +1,73 @@
+"""Live scanning: worker thread with frame skipping vs. decoding every frame inline.
+
+Plays a synthetic handheld-scan video (or `--video FILE` with `--isbn`) at
+its recorded frame rate and reports the time until the ISBN is confirmed.
+
+    python -m benchmarks.bench_live_scan [--size 1280x720] [--confirm 3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import cv2
+
+import barcode_scan
+from benchmarks.barcode_images import random_isbn, write_scan_video
+from video_scan import scan_video
+
+
+def inline_scan(path, confirm):
+    """Every frame decoded with the full pipeline in the capture loop"""
+    cap = cv2.VideoCapture(path)
+    interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30)
+    next_at = time.monotonic()
+    last, streak, frames = None, 0, 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            return None, frames
+        frames += 1
+        isbn = barcode_scan.decode_isbn(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))[0]
+        streak = streak + 1 if isbn and isbn == last else (1 if isbn else 0)
+        last = isbn
+        if streak >= confirm:
+            return isbn, frames
+        next_at += interval
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--confirm", type=int, default=3)
+    parser.add_argument("--video")
+    parser.add_argument("--isbn", help="expected ISBN when using --video")
+    args = parser.parse_args()
+
+    if args.video:
+        path, expected = args.video, args.isbn
+    else:
+        expected = random_isbn(random.Random(1))
+        w, h = (int(v) for v in args.size.split("x"))
+        path = write_scan_video(expected, os.path.join(tempfile.mkdtemp(), "scan.avi"), size=(w, h))
+
+    cap = cv2.VideoCapture(path)
+    total, fps = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    print(f"{total} frames @ {fps:.0f} fps, confirm after {args.confirm} frames")
+    print(f"{'method':<14} {'ok':>3} {'seconds':>8} {'decoded':>8} {'skipped':>8}")
+
+    start = time.perf_counter()
+    isbn, frames = inline_scan(path, args.confirm)
+    print(f"{'inline':<14} {'✓' if isbn == expected else '✗':>3} {time.perf_counter() - start:>8.2f} {frames:>8} {0:>8}")
+
+    start = time.perf_counter()
+    isbn, scanner = scan_video(path, args.confirm)
+    print(f"{'LiveScanner':<14} {'✓' if isbn == expected else '✗':>3} {time.perf_counter() - start:>8.2f} "
+          f"{scanner.frames_decoded:>8} {scanner.frames_skipped:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Books frame layout: typed schema (schema.typed_books) vs. the previous all-text frame.
+
+Reports memory use and the time of common filters / sorts on the same rows.
+
+    python -m benchmarks.bench_schema [--rows 100000] [--repeat 20]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.library import make_library
+from schema import typed_books
+
+
+def legacy_books(raw):
+    """What load_books() produced before the schema layer: int ids, every other column as read"""
+    df = raw.copy()
+    df["id"] = pd.to_numeric(df["id"], errors="coerce").fillna(0).astype(int)
+    return df.sort_values("created_at", ascending=False)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = make_library(args.rows)
+    raw = raw.astype({c: object for c in raw.columns if c != "id"})  # a sheet read: every cell is a Python str
+    start = time.perf_counter()
+    legacy = legacy_books(raw)
+    legacy_load = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    typed = typed_books(raw).sort_values("created_at", ascending=False)
+    typed_load = (time.perf_counter() - start) * 1000
+
+    since = pd.Timestamp("2023-01-01")
+    cases = [
+        ("category == 小説",
+         lambda: legacy[legacy["category"] == "小説"],
+         lambda: typed[typed["category"] == "小説"]),
+        ("status in (未読, 読書中)",
+         lambda: legacy[legacy["status"].isin(["未読", "読書中"])],
+         lambda: typed[typed["status"].isin(["未読", "読書中"])]),
+        ("created_at >= 2023",
+         lambda: legacy[pd.to_datetime(legacy["created_at"], errors="coerce") >= since],
+         lambda: typed[typed["created_at"] >= since]),
+        ("sort by created_at",
+         lambda: legacy.sort_values("created_at"),
+         lambda: typed.sort_values("created_at")),
+        ("read in 2024 (read_date)",
+         lambda: legacy[legacy["read_date"].astype(str).str.startswith("2024")],
+         lambda: typed[typed["read_date"].dt.year == 2024]),
+        ("has tag Python",
+         lambda: legacy[legacy["tags"].astype(str).str.split(",").map(lambda ts: "Python" in [t.strip() for t in ts])],
+         lambda: typed[typed["tag_list"].map(lambda ts: "Python" in ts)]),
+        ("group count by category",
+         lambda: legacy.groupby("category").size(),
+         lambda: typed.groupby("category", observed=True).size()),
+    ]
+
+    mem_legacy = legacy.memory_usage(deep=True).sum() / 1e6
+    mem_typed = typed.memory_usage(deep=True).sum() / 1e6
+    print(f"{args.rows} books")
+    print(f"{'':<28} {'legacy':>10} {'typed':>10}")
+    print(f"{'memory (deep) MB':<28} {mem_legacy:>10.1f} {mem_typed:>10.1f}")
+    print(f"{'load conversion ms':<28} {legacy_load:>10.1f} {typed_load:>10.1f}")
+    for name, old, new in cases:
+        print(f"{name:<28} {timed(old, args.repeat):>10.2f} {timed(new, args.repeat):>10.2f}")
+    per_column = pd.DataFrame({"legacy": legacy.memory_usage(deep=True, index=False) / 1e6,
+                               "typed": typed.memory_usage(deep=True, index=False) / 1e6})
+    print("\nper column MB\n" + per_column.round(2).fillna("-").to_string())
+
+
+if __name__ == "__main__":
+    main()
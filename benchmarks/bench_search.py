@@ -0,0 +1,61 @@
+"""Keyword filter: n-gram inverted index vs. the old per-row str(r.values) scan.
+
+    python -m benchmarks.bench_search [--rows 100000]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from search_index import SearchIndex
+
+HEADS = ["プログラミング", "データ", "経営", "猫", "Python", "機械学習", "歴史", "料理", "宇宙", "Design",
+         "殺人事件", "経済", "心理学", "英語", "数学", "建築", "写真", "音楽", "将棋", "投資"]
+TAILS = ["入門", "分析", "戦略", "物語", "設計", "の教科書", "大全", "Patterns", "の謎", "のすすめ",
+         "実践", "ハンドブック", "の基礎", "図鑑", "の冒険", "講義", "事典", "ノート", "の時代", "超入門"]
+WORDS = [h + t for h in HEADS for t in TAILS]
+SURNAMES = ["山田", "佐藤", "鈴木", "高橋", "田中", "村上", "東野", "Smith", "伊藤", "渡辺"]
+GIVEN = ["太郎", "花子", "一郎", "健", "春樹", "圭吾", "John", "美咲", "翔", "陽子"]
+AUTHORS = [s + g for s in SURNAMES for g in GIVEN]
+QUERIES = ["機械学習入門", "データ 分析", "村上春樹", "python", "猫 物語", "存在しない本"]
+
+
+def make_books(n, seed=0):
+    rnd = random.Random(seed)
+    return pd.DataFrame({
+        "id": range(1, n + 1),
+        "title": [" ".join(rnd.sample(WORDS, 2)) for _ in range(n)],
+        "author": [rnd.choice(AUTHORS) for _ in range(n)],
+        "tags": [",".join(rnd.sample(WORDS, 2)) for _ in range(n)],
+        "notes": [rnd.choice(["", "", "面白い", "再読したい"]) for _ in range(n)],
+        "cover_url": ["https://example.com/cover.jpg"] * n,
+        "created_at": ["2024-01-01 00:00:00"] * n,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    df = make_books(args.rows)
+    start = time.perf_counter()
+    index = SearchIndex.from_frame(df)
+    print(f"build: {(time.perf_counter() - start) * 1000:.0f} ms for {args.rows} rows")
+
+    print(f"{'query':<16} | {'hits':>6} | {'index ms':>9} | {'scan ms':>9}")
+    for q in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            hits = index.search(q)
+        index_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        start = time.perf_counter()
+        df[df.apply(lambda r: q in str(r.values), axis=1)]
+        scan_ms = (time.perf_counter() - start) * 1000
+        print(f"{q:<16} | {len(hits):>6} | {index_ms:>9.3f} | {scan_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
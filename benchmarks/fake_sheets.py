@@ -0,0 +1,109 @@
+"""In-memory stand-in for GSheetsConnection.
+
+Rows are kept as lists of cell values like the Sheets API does, so a full
+read/overwrite costs time proportional to the sheet size while an append
+only touches the new rows.
+"""
+import re
+import time
+
+import pandas as pd
+
+
+class FakeSpreadsheet:
+    def __init__(self, sheet, name):
+        self._sheet = sheet
+        self._name = name
+
+    def batch_update(self, body):
+        """Only deleteDimension (row deletes) is supported"""
+        self._sheet._sleep()
+        self._sheet.calls["batch"] += 1
+        rows = self._sheet.rows[self._name]
+        for req in body["requests"]:
+            rng = req["deleteDimension"]["range"]
+            del rows[rng["startIndex"] - 1:rng["endIndex"] - 1]  # sheet row 1 is the header
+
+
+class FakeWorksheet:
+    id = 0
+
+    def __init__(self, sheet, name):
+        self._sheet = sheet
+        self._name = name
+        self.spreadsheet = FakeSpreadsheet(sheet, name)
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self._sheet._sleep()
+        self._sheet.calls["append"] += 1
+        self._sheet.rows[self._name].extend([list(v) for v in values])
+
+    def row_values(self, row):
+        self._sheet._sleep()
+        self._sheet.calls["read"] += 1
+        return list(self._sheet.headers[self._name]) if row == 1 else list(self._sheet.rows[self._name][row - 2])
+
+    def col_values(self, col):
+        self._sheet._sleep()
+        self._sheet.calls["read"] += 1
+        return [self._sheet.headers[self._name][col - 1]] + [r[col - 1] for r in self._sheet.rows[self._name]]
+
+    def batch_update(self, cells, value_input_option="RAW"):
+        self._sheet._sleep()
+        self._sheet.calls["batch"] += 1
+        rows = self._sheet.rows[self._name]
+        for cell in cells:
+            letters, row_no = re.fullmatch(r"([A-Z]+)(\d+)", cell["range"]).groups()
+            col = 0
+            for ch in letters:
+                col = col * 26 + ord(ch) - 64
+            rows[int(row_no) - 2][col - 1] = cell["values"][0][0]
+
+
+class FakeClient:
+    def __init__(self, sheet):
+        self._sheet = sheet
+
+    def _select_worksheet(self, worksheet=None, **kwargs):
+        return FakeWorksheet(self._sheet, worksheet)
+
+
+class FakeSheetsConnection:
+    """Drop-in for conn.read / conn.update (+ the gspread worksheet calls the app makes:
+    append_rows, row_values, col_values, batch_update)"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.headers = {}
+        self.rows = {}
+        self.calls = {"read": 0, "update": 0, "append": 0, "batch": 0}
+        self.client = FakeClient(self)
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def load(self, worksheet, df):
+        self.headers[worksheet] = list(df.columns)
+        self.rows[worksheet] = df.astype(object).where(df.notna(), "").values.tolist()
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        self._sleep()
+        self.calls["read"] += 1
+        if worksheet not in self.headers:
+            return pd.DataFrame()
+        return pd.DataFrame(self.rows[worksheet], columns=self.headers[worksheet])
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        self._sleep()
+        self.calls["update"] += 1
+        self.load(worksheet, data)
+        return data
+
+
+class ReadOnlyClientConnection(FakeSheetsConnection):
+    """Same as FakeSheetsConnection but without an append API (forces the overwrite fallback)"""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.client = object()
@@ -0,0 +1,114 @@
+"""Synthetic book library in the books-sheet layout (BOOK_COLUMNS).
+
+Titles mix Japanese (kanji/kana vocabulary, series volumes, subtitles) and
+English; authors, categories, statuses and tags follow skewed distributions
+like a personal collection; ISBNs are valid 978-4 / 978-0 codes (a few
+books have none); created_at grows with id over several years, as rows
+are appended to the sheet.
+
+    python -m benchmarks.library --rows 10000 --out /tmp/books.csv
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from isbn_utils import to_isbn10
+
+JA_HEADS = ["プログラミング", "データ", "経営", "猫", "機械学習", "歴史", "料理", "宇宙", "殺人事件", "経済",
+            "心理学", "英語", "数学", "建築", "写真", "音楽", "将棋", "投資", "日本語", "哲学",
+            "統計", "デザイン", "マーケティング", "リーダーシップ", "京都", "鉄道", "昆虫", "深海", "古代ローマ", "量子"]
+JA_TAILS = ["入門", "分析", "戦略", "物語", "設計", "の教科書", "大全", "の謎", "のすすめ", "実践",
+            "ハンドブック", "の基礎", "図鑑", "の冒険", "講義", "事典", "ノート", "の時代", "超入門", "の思考法"]
+JA_SUBTITLES = ["―はじめての人のために", "〜現場で使える100のコツ〜", "(第2版)", ": 基礎から応用まで", "【新装版】"]
+EN_WORDS = ["Clean", "Code", "Python", "Data", "Design", "Patterns", "Thinking", "Fast", "Slow", "Deep",
+            "Learning", "History", "Modern", "Effective", "Practical", "Guide", "Systems", "Art", "Science", "Mind"]
+JA_SURNAMES = ["山田", "佐藤", "鈴木", "高橋", "田中", "村上", "東野", "伊藤", "渡辺", "中村", "小林", "加藤", "吉田", "宮部"]
+JA_GIVEN = ["太郎", "花子", "一郎", "健", "春樹", "圭吾", "美咲", "翔", "陽子", "みゆき", "直樹", "由美"]
+EN_AUTHORS = ["Robert C. Martin", "Martin Fowler", "Daniel Kahneman", "Yuval Noah Harari", "Kent Beck",
+              "Eric Evans", "Andrew Hunt", "Luciano Ramalho", "Donald Knuth", "Brian Kernighan"]
+CATEGORIES = ["技術書", "ビジネス", "小説", "その他"]
+CATEGORY_WEIGHTS = [0.35, 0.2, 0.3, 0.15]
+STATUSES = ["未読", "読書中", "読了"]
+STATUS_WEIGHTS = [0.45, 0.1, 0.45]
+TAGS = ["Python", "設計", "AI", "名作", "再読", "積読", "ミステリー", "SF", "自己啓発", "歴史", "英語", "お気に入り", "仕事", "漫画"]
+NOTES = ["", "", "", "", "面白い", "再読したい", "第3章が良かった", "友人から借りた", "Kindle版もあり"]
+
+
+def _isbn13(rnd, group):
+    body = "978" + group + "".join(rnd.choice("0123456789") for _ in range(9 - len(group)))
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def _title(rnd):
+    if rnd.random() < 0.2:
+        return " ".join(rnd.sample(EN_WORDS, rnd.randint(2, 4)))
+    title = rnd.choice(JA_HEADS) + rnd.choice(JA_TAILS)
+    roll = rnd.random()
+    if roll < 0.15:
+        title += f" {rnd.randint(1, 12)}"  # series volume
+    elif roll < 0.3:
+        title += " " + rnd.choice(JA_SUBTITLES)
+    return title
+
+
+def _author(rnd):
+    if rnd.random() < 0.15:
+        return rnd.choice(EN_AUTHORS)
+    return rnd.choice(JA_SURNAMES) + " " + rnd.choice(JA_GIVEN)
+
+
+def make_library(n, seed=0, now=None):
+    """DataFrame of `n` books with every BOOK_COLUMNS column as strings/ints, like a sheet read"""
+    rnd = random.Random(seed)
+    now = now or datetime(2024, 6, 1, 12, 0, 0)
+    rows = []
+    created = now - timedelta(minutes=n * 165)
+    for i in range(1, n + 1):
+        isbn = "" if rnd.random() < 0.05 else _isbn13(rnd, "4" if rnd.random() < 0.8 else "0")
+        status = rnd.choices(STATUSES, STATUS_WEIGHTS)[0]
+        created += timedelta(minutes=rnd.randint(30, 300))
+        read_date = (created + timedelta(days=rnd.randint(1, 90))).strftime("%Y-%m-%d") if status == "読了" else ""
+        if not isbn or rnd.random() < 0.1:
+            cover = ""
+        else:
+            cover = rnd.choice([
+                f"http://books.google.com/books/content?id={isbn[-8:]}&printsec=frontcover&img=1&zoom=1",
+                f"https://cover.openbd.jp/{isbn}.jpg",
+                f"https://images-na.ssl-images-amazon.com/images/P/{to_isbn10(isbn)}.09.LZZZZZZZ.jpg",
+            ])
+        rows.append({
+            "id": i,
+            "title": _title(rnd),
+            "author": _author(rnd),
+            "category": rnd.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            "tags": ", ".join(rnd.sample(TAGS, rnd.choice([0, 1, 1, 2, 3]))),
+            "status": status,
+            "notes": rnd.choice(NOTES),
+            "cover_url": cover,
+            "read_date": read_date,
+            "isbn": isbn,
+            "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write CSV here (default: print a sample)")
+    args = parser.parse_args()
+
+    df = make_library(args.rows, args.seed)
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"{len(df)} books -> {args.out}")
+    else:
+        print(df.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
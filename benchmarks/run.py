@@ -0,0 +1,228 @@
+"""Benchmark suite: times the app's hot paths against the in-memory sheet and the
+stub Google Books / OpenBD servers, and writes a JSON report that can be
+compared with an earlier run.
+
+    python -m benchmarks.run [--sizes 1000 10000 100000] [--storage sheets|sqlite|parquet]
+                             [--latency 0.05] [--api-latency 0.05]
+                             [--repeat 5] [--cases get_books filter] [--out report.json]
+                             [--compare previous.json] [--threshold 0.15]
+
+Per library size: get_books (cold load / warm snapshot), the keyword and
+category filter, add_book, update_book and the write-queue flush. Once:
+fetch_book_info and search_books_by_title, over the network stubs and from
+their caches. With --compare the exit code is 1 when any case got slower
+than --threshold (and by more than 1 ms).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import benchmarks  # noqa: F401  (quiet logs)
+import app
+from benchmarks.fake_sheets import FakeSheetsConnection
+from benchmarks.library import make_library
+from benchmarks.stub_servers import StubBooksServer
+from storage import BACKENDS, open_storage
+
+QUERIES = ["機械学習入門", "データ 分析", "村上", "python", "猫の冒険", "存在しない本"]
+NOISE_FLOOR_MS = 1.0
+
+
+def wanted(case, args):
+    return not args.cases or case.startswith(tuple(args.cases))
+
+
+def measure(fn, repeat, setup=None):
+    """fn(i) timed `repeat` times (setup(i) runs untimed before each call)"""
+    times = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(times[0], 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 3),
+        "runs": len(times),
+    }
+
+
+def configure(tmp, args):
+    """Point app settings at a scratch dir and drop process-wide objects built with other settings"""
+    settings = {
+        "write_journal_path": os.path.join(tmp, "journal.jsonl"),
+        "metadata_cache_path": os.path.join(tmp, "metadata.sqlite3"),
+        "write_flush_interval": 3600,  # flushes are timed explicitly
+        "write_max_pending": 10**9,
+        "lookup_fill_wait": 1.0,
+    }
+    app.get_setting = lambda name, default=None: settings.get(name, default)
+    for cached in (app.get_books_cache, app.get_write_queue, app.get_metadata_cache, app.get_search_pages):
+        cached.clear()
+
+
+def sheet_cases(n, args, tmp):
+    library = make_library(n)
+    if args.storage == "sheets":
+        conn = FakeSheetsConnection(latency=args.latency)
+        conn.load("books", library)
+        app.get_conn = lambda: conn
+    else:
+        path = os.path.join(tmp, f"{args.storage}-{n}")
+        storage = open_storage(args.storage, sqlite_path=path + ".sqlite3", parquet_dir=path)
+        storage.replace_books(library)
+        app.get_storage = lambda: storage
+    results = {}
+
+    def cold(_):
+        app.get_books_cache.clear()
+        app.get_write_queue.clear()
+
+    if wanted("get_books.cold", args):
+        results["get_books.cold"] = measure(lambda _: app.get_books(), args.repeat, setup=cold)
+    if wanted("get_books.warm", args):
+        results["get_books.warm"] = measure(lambda _: app.get_books(), args.repeat * 10)
+
+    # First keyword query after a new snapshot pays for the search index
+    def new_snapshot(_):
+        app.get_books_cache.clear()
+        app.get_books()
+    if wanted("filter.keyword_cold", args):
+        results["filter.keyword_cold"] = measure(
+            lambda _: app._filter_positions(app.get_books(), QUERIES[0], ()), args.repeat, setup=new_snapshot)
+    df = app.get_books()
+    if wanted("filter.keyword", args):
+        results["filter.keyword"] = measure(
+            lambda i: app._filter_positions(df, QUERIES[i % len(QUERIES)], ()), args.repeat * len(QUERIES))
+    if wanted("filter.category", args):
+        results["filter.category"] = measure(lambda _: app._filter_positions(df, "", ("小説", "技術書")), args.repeat)
+
+    if wanted("add_book", args):
+        results["add_book"] = measure(
+            lambda i: app.add_book(f"ベンチ本 {i}", "Bench", "技術書", "", "未読", "", "", "", ""), args.repeat)
+    ids = app.get_books()["id"].tolist()
+    if wanted("update_book", args):
+        results["update_book"] = measure(
+            lambda i: app.update_book(ids[i * 7 % len(ids)], f"更新 {i}", "Bench", "小説", "", "読了", "", ""),
+            args.repeat)
+
+    def queue_edits(i):
+        for k in range(20):
+            app.update_book(ids[(i * 20 + k) * 13 % len(ids)], f"一括 {k}", "Bench", "小説", "", "読了", "", "")
+    if wanted("write_flush.20", args):
+        results["write_flush.20"] = measure(lambda _: app.get_write_queue().flush(), args.repeat, setup=queue_edits)
+    return results
+
+
+def lookup_cases(args):
+    results = {}
+    isbns = (f"978{n:010d}" for n in itertools.count(4100000000))
+    with StubBooksServer(google_latency=args.api_latency, openbd_latency=args.api_latency) as stub:
+        app.GOOGLE_BOOKS_API = stub.google_url
+        app.OPENBD_API = stub.openbd_url
+        if wanted("fetch_book_info.network", args):
+            results["fetch_book_info.network"] = measure(lambda _: app.fetch_book_info(next(isbns)), args.repeat)
+        cached_isbn = next(isbns)
+        app.fetch_book_info(cached_isbn)
+        if wanted("fetch_book_info.cached", args):
+            results["fetch_book_info.cached"] = measure(lambda _: app.fetch_book_info(cached_isbn), args.repeat)
+        if wanted("search_books_by_title.network", args):
+            results["search_books_by_title.network"] = measure(
+                lambda i: app.search_books_by_title(f"ベンチ検索{i}"), args.repeat)
+        app.search_books_by_title("ベンチ検索 cached")
+        if wanted("search_books_by_title.cached", args):
+            results["search_books_by_title.cached"] = measure(
+                lambda _: app.search_books_by_title("ベンチ検索 cached"), args.repeat)
+        app.get_prefetch_executor().submit(lambda: None).result()  # let page prefetches settle
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(app.__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old, new, threshold):
+    """Print old vs. new medians; returns the list of regressed case keys"""
+    regressions = []
+    print(f"\n{'case':<40} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for key, res in new["results"].items():
+        prev = old["results"].get(key)
+        if prev is None:
+            print(f"{key:<40} {'-':>10} {res['median_ms']:>10.2f} {'new':>8}")
+            continue
+        a, b = prev["median_ms"], res["median_ms"]
+        change = (b - a) / a if a else 0.0
+        flag = ""
+        if change > threshold and b - a > NOISE_FLOOR_MS:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40} {a:>10.2f} {b:>10.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--storage", choices=BACKENDS, default="sheets", help="backend behind get_books / writes")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per sheet API call")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="stub Google Books / OpenBD latency (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", nargs="+", help="only cases starting with one of these prefixes")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="booklog-bench-")
+    configure(tmp, args)
+    results = {}
+    for n in args.sizes:
+        for case, res in sheet_cases(n, args, tmp).items():
+            results[f"{case}@{n}"] = dict(res, case=case, rows=n)
+            print(f"{case + '@' + str(n):<40} {res['median_ms']:>10.2f} ms")
+    for case, res in lookup_cases(args).items():
+        results[case] = dict(res, case=case, rows=None)
+        print(f"{case:<40} {res['median_ms']:>10.2f} ms")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"report -> {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Local stand-ins for the Google Books and OpenBD APIs with injected latency.
+
+    with StubBooksServer(google_latency=0.8) as stub:
+        app.GOOGLE_BOOKS_API = stub.google_url
+        app.OPENBD_API = stub.openbd_url
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _google_item(isbn, title, with_cover):
+    info = {
+        "title": title,
+        "authors": [f"著者 {isbn[-3:]}"],
+        "publisher": "Stub出版",
+        "publishedDate": "2020-01-01",
+        "industryIdentifiers": [{"type": "ISBN_13", "identifier": isbn}],
+    }
+    if with_cover:
+        info["imageLinks"] = {"thumbnail": f"http://covers.invalid/google/{isbn}.jpg"}
+    return {"volumeInfo": info}
+
+
+class StubBooksServer:
+    def __init__(self, google_latency=0.0, openbd_latency=0.0, google_found=True, openbd_found=True,
+                 google_cover=True, openbd_cover=True):
+        self.google_latency = google_latency
+        self.openbd_latency = openbd_latency
+        self.google_found = google_found
+        self.openbd_found = openbd_found
+        self.google_cover = google_cover
+        self.openbd_cover = openbd_cover
+        self.requests = {"google": 0, "openbd": 0}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def google_url(self):
+        return self.base_url + "/books/v1/volumes"
+
+    @property
+    def openbd_url(self):
+        return self.base_url + "/v1/get"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Responses ---
+    def google(self, params):
+        q = params.get("q", [""])[0]
+        if q.startswith("isbn:"):
+            isbn = q[5:]
+            if not self.google_found:
+                return {"kind": "books#volumes", "totalItems": 0}
+            return {"totalItems": 1, "items": [_google_item(isbn, f"Stub Book {isbn}", self.google_cover)]}
+        # Title search: deterministic page of results for (query, startIndex)
+        start = int(params.get("startIndex", ["0"])[0])
+        count = int(params.get("maxResults", ["10"])[0])
+        query = q.replace("intitle:", "")
+        items = [
+            _google_item(f"978{abs(hash((query, i))) % 10**10:010d}", f"{query} 第{i + 1}巻", self.google_cover)
+            for i in range(start, start + count)
+        ]
+        return {"totalItems": 1000, "items": items}
+
+    def openbd(self, params):
+        out = []
+        for isbn in params.get("isbn", [""])[0].split(","):
+            if not self.openbd_found:
+                out.append(None)
+                continue
+            summary = {"isbn": isbn, "title": f"スタブ本 {isbn}", "author": f"著者 {isbn[-3:]}", "publisher": "Stub出版"}
+            summary["cover"] = f"http://covers.invalid/openbd/{isbn}.jpg" if self.openbd_cover else ""
+            out.append({"summary": summary})
+        return out
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                if url.path.startswith("/books/v1/volumes"):
+                    stub.requests["google"] += 1
+                    time.sleep(stub.google_latency)
+                    body = stub.google(params)
+                elif url.path.startswith("/v1/get"):
+                    stub.requests["openbd"] += 1
+                    time.sleep(stub.openbd_latency)
+                    body = stub.openbd(params)
+                else:
+                    self.send_error(404)
+                    return
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
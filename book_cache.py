@@ -0,0 +1,155 @@
+"""Versioned stale-while-revalidate cache for sheet snapshots.
+
+Streamlit re-executes app.py on every rerun, so anything that has to survive
+between reruns lives in an imported module (and is held by st.cache_resource).
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SnapshotCache:
+    """Keeps the last loaded snapshot and serves it immediately.
+
+    - Empty / invalidated -> load synchronously (miss); concurrent callers share that one load
+    - Older than max_age  -> serve the old snapshot, refresh in a background thread
+    - `version` increases every time the stored snapshot changes, so sessions can
+      tell that someone else wrote (a refresh that returns `same` data keeps it)
+    """
+
+    def __init__(self, max_age=300, same=None):
+        self.max_age = max_age
+        self.same = same
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+        self._value = None
+        self._derived = {}
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._loading = None  # (version, Future) of the in-flight miss load
+        self._lock = threading.Lock()
+
+    def get(self, loader):
+        with self._lock:
+            if self._value is not None:
+                self.hits += 1
+                if self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age:
+                    self.stale_hits += 1
+                    if not self._refreshing:
+                        self._refreshing = True
+                        threading.Thread(target=self._refresh, args=(loader, self.version), daemon=True).start()
+                return self._value
+            version = self.version
+            if self._loading is not None and self._loading[0] == version:
+                # Someone is already loading this version: wait for their result (single flight)
+                self.coalesced += 1
+                pending = self._loading[1]
+            else:
+                self.misses += 1
+                pending = None
+                future = Future()
+                self._loading = (version, future)
+        if pending is not None:
+            return pending.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            self._finish_load(future)
+            future.set_exception(e)
+            raise
+        self._store(value, version)
+        self._finish_load(future)
+        future.set_result(value)
+        return value
+
+    def _finish_load(self, future):
+        with self._lock:
+            if self._loading is not None and self._loading[1] is future:
+                self._loading = None
+
+    def _refresh(self, loader, version):
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+                self._refreshing = False
+            return
+        self._store(value, version)
+        with self._lock:
+            self._refreshing = False
+
+    def _store(self, value, version):
+        old = self._value
+        unchanged = old is not None and self.same is not None and self.same(old, value)  # outside the lock
+        with self._lock:
+            # A write invalidated the snapshot while we were loading -> drop the old data
+            if version != self.version:
+                return
+            self._loaded_at = time.monotonic()
+            if unchanged and self._value is old:
+                return  # unchanged: keep the version (and everything derived from it)
+            self._value = value
+            self.version += 1
+
+    def peek(self):
+        """Current snapshot without loading or counting (None if empty)"""
+        return self._value
+
+    def version_of(self, value):
+        """Version of `value` if it is the current snapshot, else None"""
+        with self._lock:
+            return self.version if value is self._value else None
+
+    def derive(self, name, builder, value):
+        """builder(value), computed once per snapshot version (when `value` is the current snapshot)"""
+        with self._lock:
+            version = self.version if value is self._value else None
+            cached = self._derived.get(name)
+            if version is not None and cached and cached[0] == version:
+                return cached[1]
+        result = builder(value)
+        if version is not None:
+            with self._lock:
+                if self.version == version:
+                    self._derived[name] = (version, result)
+        return result
+
+    def update(self, fn, carry=None):
+        """Apply a local write to the current snapshot (write-through) instead of dropping it.
+        `carry` maps derived names to patch(derived, old_value, new_value): those objects are
+        updated for the new version instead of being rebuilt by the next derive()."""
+        with self._lock:
+            if self._value is None:
+                return
+            old, old_version = self._value, self.version
+            self._value = fn(old)
+            self.version += 1
+            for name, patch in (carry or {}).items():
+                cached = self._derived.get(name)
+                if cached and cached[0] == old_version:
+                    self._derived[name] = (self.version, patch(cached[1], old, self._value))
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self.version += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale_hits": self.stale_hits,
+                "refresh_errors": self.refresh_errors,
+                "hit_rate": self.hits / total if total else 0.0,
+                "age": time.monotonic() - self._loaded_at if self._value is not None else None,
+            }
@@ -0,0 +1,154 @@
+"""Background job that validates and backfills cover_url values.
+
+Rows with an empty or not-yet-validated cover_url are checked at a limited
+rate, and only while no interactive request is in flight. Candidate URLs are
+probed concurrently with HEAD requests (status, content type and size; Amazon
+answers missing covers with a 43-byte 1x1 GIF). The first good candidate is
+written back through `write_fn`, which only touches the changed cells.
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from http_client import RateLimiter
+
+MIN_IMAGE_BYTES = 1000  # anything smaller is a "no image" pixel
+RECHECK_AFTER = 30 * 86400
+
+
+def probe_image(client, url):
+    """True = real image, False = dead / placeholder, None = could not tell (network)"""
+    provider = "covers:" + urlparse(url).netloc
+    try:
+        r = client.head(provider, url, timeout=5)
+        if r.status_code in (403, 405):
+            # Some CDNs refuse HEAD; ask for just the first bytes instead (body streamed, not downloaded)
+            r = client.request("GET", provider, url, timeout=5, stream=True,
+                               headers={"Range": f"bytes=0-{MIN_IMAGE_BYTES - 1}"})
+    except Exception:
+        return None
+    try:
+        if r.status_code == 429 or r.status_code >= 500:
+            return None
+        if r.status_code not in (200, 206):
+            return False
+        if not r.headers.get("Content-Type", "").startswith("image/"):
+            return False
+        # 206: "bytes 0-999/43" -> the full size is after the slash
+        length = r.headers.get("Content-Range", "").rpartition("/")[2] if r.status_code == 206 else r.headers.get("Content-Length")
+        if length is not None and length.isdigit():
+            return int(length) >= MIN_IMAGE_BYTES
+        if r.request.method != "GET":
+            return True
+        return len(next(r.iter_content(MIN_IMAGE_BYTES), b"")) >= MIN_IMAGE_BYTES
+    finally:
+        r.close()
+
+
+class CoverBackfillWorker:
+    def __init__(self, client, snapshot_fn, candidates_fn, write_fn, db_path,
+                 rate=2.0, interval=600, batch_size=20, max_rows_per_run=200):
+        self.client = client
+        self.snapshot_fn = snapshot_fn      # () -> current books DataFrame (or None)
+        self.candidates_fn = candidates_fn  # (row) -> candidate URLs, best first
+        self.write_fn = write_fn            # ({book_id: new_cover_url}) -> None
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_rows_per_run = max_rows_per_run
+        self.checked = 0
+        self.fixed = 0
+        self.last_run = None
+        self._limiter = RateLimiter(rate)
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cover-probe")
+        self._wake = threading.Event()
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cover_checks (key TEXT PRIMARY KEY, ok INTEGER, checked_at REAL)")
+        self._db.commit()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def trigger(self):
+        self._wake.set()
+
+    def _checked_keys(self):
+        cutoff = time.time() - RECHECK_AFTER
+        with self._db_lock:
+            return {k for (k,) in self._db.execute("SELECT key FROM cover_checks WHERE checked_at >= ?", (cutoff,))}
+
+    def _record(self, key, ok):
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO cover_checks (key, ok, checked_at) VALUES (?, ?, ?)",
+                             (key, None if ok is None else int(ok), time.time()))
+            self._db.commit()
+
+    def _run(self):
+        time.sleep(5)  # let the first page render before doing anything
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _pending_rows(self, df):
+        checked = self._checked_keys()
+        rows = []
+        for row in df.to_dict("records"):
+            url = row.get("cover_url") or ""
+            key = url if url else f"book:{row['id']}"
+            if key not in checked:
+                rows.append((row, url))
+        return rows
+
+    def _probe(self, url):
+        # Interactive traffic first: wait for it to drain, then respect our own rate
+        self.client.wait_for_idle()
+        self._limiter.acquire()
+        with self.client.background():
+            return probe_image(self.client, url)
+
+    def run_once(self):
+        df = self.snapshot_fn()
+        if df is None or df.empty:
+            return
+        self.last_run = time.strftime("%H:%M:%S")
+        changes = {}
+        for row, url in self._pending_rows(df)[:self.max_rows_per_run]:
+            if url:
+                ok = self._probe(url)
+                self.checked += 1
+                if ok is None:
+                    continue  # unknown: retry next run
+                self._record(url, ok)
+                if ok:
+                    continue
+            with self.client.background():
+                self.client.wait_for_idle()
+                self._limiter.acquire()  # candidate lookups call the book APIs: same budget as probes
+                candidates = [c for c in self.candidates_fn(row) if c and c != url]
+            results = list(self._pool.map(self._probe, candidates))
+            self.checked += len(candidates)
+            for cand, ok in zip(candidates, results):
+                if ok is not None:
+                    self._record(cand, ok)
+            best = next((c for c, ok in zip(candidates, results) if ok), None)
+            if best:
+                changes[row["id"]] = best
+            else:
+                self._record(f"book:{row['id']}", False)
+            if len(changes) >= self.batch_size:
+                self._flush(changes)
+        self._flush(changes)
+
+    def _flush(self, changes):
+        if not changes:
+            return
+        self.write_fn(dict(changes))
+        self.fixed += len(changes)
+        changes.clear()
+
+    def stats(self):
+        return {"checked": self.checked, "fixed": self.fixed, "last_run": self.last_run}
@@ -0,0 +1,175 @@
+"""Local cover thumbnail cache.
+
+Remote covers are downloaded once, shrunk to card size and stored as WebP
+under a content-addressed name (sha256 of the WebP bytes), so identical
+images share one file. An SQLite index (`index_path`, kept outside the served
+directory) maps source URL -> digest; dead URLs
+(HTTP errors, Amazon's 1x1 "no image" GIF) are remembered as negatives.
+Least recently used entries are evicted once the files exceed `max_bytes`.
+"""
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from PIL import Image, ImageDraw
+
+THUMB_SIZE = (240, 360)  # 2x the 120px card box
+NEGATIVE_TTL = 86400
+TOUCH_BATCH = 256      # buffered accessed_at updates written per commit
+TOUCH_INTERVAL = 30.0  # ... or at least this often (seconds)
+
+
+class CoverCache:
+    def __init__(self, directory, index_path, client, executor, max_bytes=200 * 1024 * 1024, quality=80):
+        self.directory = directory
+        self.client = client
+        self.executor = executor
+        self.max_bytes = max_bytes
+        self.quality = quality
+        os.makedirs(directory, exist_ok=True)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._touched = {}  # url -> accessed_at not yet written (hits don't commit one by one)
+        self._touched_at = time.monotonic()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS covers ("
+            " url TEXT PRIMARY KEY, digest TEXT, size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self._db.commit()
+
+    def path_for(self, digest):
+        return os.path.join(self.directory, digest + ".webp")
+
+    def lookup(self, url):
+        """('hit', digest) / ('dead', None) / ('pending', None); a miss schedules a background download"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT digest, stored_at FROM covers WHERE url = ?", (url,)).fetchone()
+            if row is not None:
+                digest, stored_at = row
+                if digest is None and now - stored_at < NEGATIVE_TTL:
+                    return "dead", None
+                if digest is not None and os.path.exists(self.path_for(digest)):
+                    self._touched[url] = now
+                    if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_at > TOUCH_INTERVAL:
+                        self._flush_touched()
+                    return "hit", digest
+            if url not in self._in_flight:
+                self._in_flight.add(url)
+                self.executor.submit(self._download, url)
+        return "pending", None
+
+    def _download(self, url):
+        try:
+            try:
+                r = self.client.get("covers:" + urlparse(url).netloc, url, timeout=5)
+            except Exception:
+                return  # network trouble: try again on a later rerun
+            if r.status_code == 429 or r.status_code >= 500:
+                return
+            digest, size = None, 0
+            if r.status_code == 200 and r.content:
+                try:
+                    data = self.to_webp(Image.open(io.BytesIO(r.content)))
+                    if data is not None:
+                        digest, size = self.store(data)
+                except Exception:
+                    pass  # not an image -> negative entry
+            now = time.time()
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO covers (url, digest, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, digest, size, now, now),
+                )
+                self._db.commit()
+            self._evict()
+        finally:
+            with self._lock:
+                self._in_flight.discard(url)
+
+    def _flush_touched(self):
+        """Write buffered accessed_at updates in one transaction (caller holds the lock)"""
+        if self._touched:
+            self._db.executemany("UPDATE covers SET accessed_at = ? WHERE url = ?",
+                                 [(t, url) for url, t in self._touched.items()])
+            self._db.commit()
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def to_webp(self, img):
+        """Resized WebP bytes, or None for placeholder-sized images (Amazon returns a 1x1 GIF)"""
+        if img.width <= 1 or img.height <= 1:
+            return None
+        img = img.convert("RGB")
+        img.thumbnail(THUMB_SIZE)
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=self.quality, method=4)
+        return buf.getvalue()
+
+    def store(self, data):
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        path = self.path_for(digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest, len(data)
+
+    def _evict(self):
+        with self._lock:
+            self._flush_touched()  # LRU order needs the latest access times
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM covers"
+                " WHERE digest IS NOT NULL GROUP BY digest)"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute(
+                "SELECT url, digest, size FROM covers WHERE digest IS NOT NULL ORDER BY accessed_at"
+            ).fetchall()
+            for url, digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM covers WHERE url = ?", (url,))
+                (refs,) = self._db.execute("SELECT COUNT(*) FROM covers WHERE digest = ?", (digest,)).fetchone()
+                if refs == 0:
+                    try:
+                        os.remove(self.path_for(digest))
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            self._db.commit()
+
+    def placeholder(self, name="placeholder"):
+        """Locally generated "No Image" cover (created on first use)"""
+        path = self.path_for(name)
+        if not os.path.exists(path):
+            img = Image.new("RGB", THUMB_SIZE, "#e0e0e0")
+            draw = ImageDraw.Draw(img)
+            text = "No Image"
+            left, top, right, bottom = draw.textbbox((0, 0), text)
+            draw.text(((THUMB_SIZE[0] - right + left) / 2, (THUMB_SIZE[1] - bottom + top) / 2), text, fill="#999999")
+            buf = io.BytesIO()
+            img.save(buf, format="WEBP", quality=self.quality)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(buf.getvalue())
+            os.replace(tmp, path)
+        return path
+
+    def stats(self):
+        with self._lock:
+            files, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM covers"
+                " WHERE digest IS NOT NULL GROUP BY digest)"
+            ).fetchone()
+            (dead,) = self._db.execute("SELECT COUNT(*) FROM covers WHERE digest IS NULL").fetchone()
+            return {"files": files, "bytes": size, "dead": dead, "in_flight": len(self._in_flight)}
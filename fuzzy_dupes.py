@@ -0,0 +1,163 @@
+"""Near-duplicate finder for books without an ISBN (MinHash + LSH).
+
+Titles are NFKC-normalized (full/half-width variants collapse), stripped of
+spaces and punctuation, and cut at the first subtitle separator. Their
+character bigrams are MinHashed; the signature is split into bands and
+books sharing any band bucket become candidates. Only candidates are
+compared exactly (Jaccard of the bigram sets), so a lookup costs a few
+dict probes instead of a pass over every title.
+
+The index is kept in sync with the books snapshot incrementally: `sync()`
+only hashes rows that were added or changed since the last call.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from search_index import normalize_text
+
+NUM_PERM = 64
+BANDS = 16          # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always collide
+THRESHOLD = 0.6
+AUTHOR_WEIGHT = 0.2
+
+# Universal hashes (a*x + b) mod p; a and b span the whole field so the
+# permutations are independent (uint64 products wrap, as in the usual numpy MinHash)
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+_SUBTITLE = re.compile(r"[:：\-―—〜~(（\[【「『]")
+_NOISE = re.compile(r"[\s・･.,、。!！?？'\"“”‘’]+")
+
+
+def main_title(title):
+    """Normalized title without its subtitle ("リーダブルコード ―より良い…" -> "リーダブルコード")"""
+    text = normalize_text(title).strip()
+    head = _SUBTITLE.split(text, maxsplit=1)[0]
+    return _NOISE.sub("", head if len(head) >= 2 else text)
+
+
+def shingles(text, n=2):
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(grams):
+    """NUM_PERM-long signature of a set of strings"""
+    h = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    return (((np.outer(h, _A) + _B) % _PRIME) & _MAX_HASH).min(axis=0)
+
+
+class DuplicateFinder:
+    def __init__(self, threshold=THRESHOLD, bands=BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._books = {}    # id -> (title, author, title grams, author grams, band keys)
+        self._buckets = {}  # (band, bytes) -> set of ids
+        self.version = None  # snapshot version of the last sync (None = unknown / not a snapshot)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # one sync at a time, so `version` matches the contents
+
+    def _features(self, title, author):
+        t_grams = shingles(main_title(title))
+        a_grams = shingles(_NOISE.sub("", normalize_text(author)))
+        if not t_grams:
+            return t_grams, a_grams, []
+        sig = minhash(sorted(t_grams))
+        keys = [(b, sig[b * self.rows:(b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+        return t_grams, a_grams, keys
+
+    def add(self, book_id, title, author=""):
+        t_grams, a_grams, keys = self._features(title, author)
+        with self._lock:
+            self._remove(book_id)
+            self._books[book_id] = (title, author, t_grams, a_grams, keys)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(book_id)
+
+    def remove(self, book_id):
+        with self._lock:
+            self._remove(book_id)
+
+    def _remove(self, book_id):
+        old = self._books.pop(book_id, None)
+        if old is None:
+            return
+        for key in old[4]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(book_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def sync(self, df, version=None):
+        """Bring the index in line with a books frame (only new / edited / removed rows are touched).
+        `version` is remembered so callers can skip the sync while the snapshot is unchanged."""
+        with self._sync_lock:
+            if df.empty or "title" not in df.columns:
+                current = {}
+            else:
+                authors = df["author"] if "author" in df.columns else [""] * len(df)
+                current = {int(i): (str(t), str(a)) for i, t, a in zip(df["id"], df["title"], authors)}
+            with self._lock:
+                stale = [i for i in self._books if i not in current]
+                known = {i: v[:2] for i, v in self._books.items()}
+            for book_id in stale:
+                self.remove(book_id)
+            for book_id, (title, author) in current.items():
+                if known.get(book_id) != (title, author):
+                    self.add(book_id, title, author)
+            with self._lock:
+                self.version = version
+            return len(current)
+
+    def _score(self, t_grams, a_grams, other):
+        score = jaccard(t_grams, other[2])
+        if a_grams and other[3]:
+            score = (1 - AUTHOR_WEIGHT) * score + AUTHOR_WEIGHT * jaccard(a_grams, other[3])
+        return score
+
+    def query(self, title, author="", exclude=None, limit=5):
+        """[(id, score)] of registered books that look like the same title, best first"""
+        t_grams, a_grams, keys = self._features(title, author)
+        with self._lock:
+            cands = set()
+            for key in keys:
+                cands |= self._buckets.get(key, set())
+            cands.discard(exclude)
+            scored = [(i, self._score(t_grams, a_grams, self._books[i])) for i in cands]
+        scored = [(i, round(s, 3)) for i, s in scored if s >= self.threshold]
+        scored.sort(key=lambda x: -x[1])
+        return scored[:limit]
+
+    def report(self):
+        """All candidate pairs [(id_a, id_b, score)] with score >= threshold, best first"""
+        with self._lock:
+            pairs = set()
+            for bucket in self._buckets.values():
+                if len(bucket) > 1:
+                    ids = sorted(bucket)
+                    pairs.update((a, b) for n, a in enumerate(ids) for b in ids[n + 1:])
+            out = []
+            for a, b in pairs:
+                s = self._score(self._books[a][2], self._books[a][3], self._books[b])
+                if s >= self.threshold:
+                    out.append((a, b, round(s, 3)))
+        out.sort(key=lambda x: (-x[2], x[0], x[1]))
+        return out
+
+    def __len__(self):
+        return len(self._books)
@@ -0,0 +1,196 @@
+"""Shared HTTP client for the external book APIs.
+
+- One keep-alive requests.Session (pooled connections) for every provider
+- Bounded retries with jittered exponential backoff on connection errors / 429 / 5xx,
+  all within one `timeout` budget per call; a timed-out request is not retried
+- A circuit breaker per provider: after `failure_threshold` consecutive failed
+  attempts the provider is skipped for `cooldown` seconds
+- Per-provider latency / error counters
+- Requests made inside `with client.background():` are counted separately so
+  background jobs can yield while interactive requests are in flight, and go
+  through their own "<provider>:background" breaker so background failures
+  never open the circuit interactive lookups depend on
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class RateLimiter:
+    """Thread-safe limiter: at most `rate` acquire() calls per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.cooldown else "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: let one probe through, re-open immediately if it fails
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    def __init__(self, timeout=5, retries=2, backoff=0.3, pool_size=16, failure_threshold=5, cooldown=30.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.interactive_in_flight = 0
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _provider(self, name):
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(self.failure_threshold, self.cooldown)
+                self._stats[name] = {"requests": 0, "errors": 0, "retries": 0, "short_circuits": 0,
+                                     "latency_total": 0.0, "latency_max": 0.0, "last_error": None}
+            return self._breakers[name], self._stats[name]
+
+    def _count(self, stats, **changes):
+        with self._lock:
+            for k, v in changes.items():
+                if k == "last_error":
+                    stats[k] = v
+                elif k == "latency":
+                    stats["latency_total"] += v
+                    stats["latency_max"] = max(stats["latency_max"], v)
+                else:
+                    stats[k] += v
+
+    @contextmanager
+    def background(self):
+        """Mark requests made by this thread as background (low priority) traffic"""
+        self._local.background = True
+        try:
+            yield
+        finally:
+            self._local.background = False
+
+    def wait_for_idle(self, poll=0.2):
+        """Block while interactive requests are in flight"""
+        while self.interactive_in_flight:
+            time.sleep(poll)
+
+    def get(self, provider, url, params=None, timeout=None):
+        return self.request("GET", provider, url, params=params, timeout=timeout)
+
+    def head(self, provider, url, timeout=None):
+        return self.request("HEAD", provider, url, timeout=timeout, allow_redirects=True)
+
+    def request(self, method, provider, url, timeout=None, **kwargs):
+        """Request with retries; raises CircuitOpenError while the provider is cooling down.
+        A final 429/5xx response is returned as-is (callers use raise_for_status)."""
+        interactive = not getattr(self._local, "background", False)
+        if not interactive:
+            provider += ":background"
+        if interactive:
+            with self._lock:
+                self.interactive_in_flight += 1
+        try:
+            return self._request(method, provider, url, timeout, **kwargs)
+        finally:
+            if interactive:
+                with self._lock:
+                    self.interactive_in_flight -= 1
+
+    def _request(self, method, provider, url, timeout, **kwargs):
+        breaker, stats = self._provider(provider)
+        if not breaker.allow():
+            self._count(stats, short_circuits=1)
+            raise CircuitOpenError(f"{provider}: circuit open")
+
+        # Retries share the call's timeout: a dead provider costs `timeout`, not (retries + 1) x timeout
+        deadline = time.monotonic() + (timeout or self.timeout)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count(stats, retries=1)
+                # Full jitter: sleep somewhere in [0, backoff * 2^attempt)
+                time.sleep(min(random.uniform(0, self.backoff * 2 ** attempt), max(0, deadline - time.monotonic())))
+            start = time.monotonic()
+            try:
+                r = self.session.request(method, url, timeout=max(0.1, deadline - start), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count(stats, requests=1, errors=1, latency=time.monotonic() - start, last_error=str(e))
+                breaker.record_failure()  # every failed attempt counts toward opening the circuit
+                if isinstance(e, requests.Timeout) or not self._can_retry(attempt, deadline, breaker):
+                    raise
+                continue
+            self._count(stats, requests=1, latency=time.monotonic() - start)
+            if r.status_code in RETRY_STATUS:
+                self._count(stats, errors=1, last_error=f"HTTP {r.status_code}")
+                breaker.record_failure()
+                if self._can_retry(attempt, deadline, breaker):
+                    continue
+                return r
+            breaker.record_success()
+            return r
+
+    def _can_retry(self, attempt, deadline, breaker):
+        return attempt < self.retries and time.monotonic() < deadline and breaker.state == "closed"
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for name, s in self._stats.items():
+                out[name] = dict(s)
+                out[name]["latency_avg"] = s["latency_total"] / s["requests"] if s["requests"] else 0.0
+                out[name]["state"] = self._breakers[name].state
+            return out
@@ -0,0 +1,179 @@
+"""ISBN normalization, validation and ISBN-10 <-> ISBN-13 conversion.
+
+The scalar helpers are what the UI uses for a single input. The `*_column`
+functions do the same for a whole column at once: the strings are turned
+into a digit matrix and the checksums are computed with NumPy, instead of a
+Python loop per row and per character.
+
+`IsbnIndex` maps canonical ISBN-13 -> book id so duplicates are found with a
+dict lookup instead of a scan of the books frame.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+ISBN_PREFIXES = ("978", "979")  # EAN-13 "Bookland" prefixes
+WEIGHTS_13 = np.array([1, 3] * 6, dtype=np.int64)
+WEIGHTS_10 = np.arange(10, 1, -1, dtype=np.int64)  # 10..2 for the first nine digits
+
+
+def clean_isbn(value):
+    """Strip hyphens, spaces and a float-ish '.0' suffix (sheet cells read as numbers)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    s = re.sub(r"\.0$", "", str(value).strip())
+    s = re.sub(r"[\s\-]", "", s).upper()
+    return "" if s in ("NAN", "NONE") else s
+
+
+def is_valid_isbn13(isbn):
+    if len(isbn) != 13 or not isbn.isdigit(): return False
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(isbn[:12]))
+    return (10 - total % 10) % 10 == int(isbn[12])
+
+
+def is_valid_isbn10(isbn):
+    if len(isbn) != 10 or not isbn[:9].isdigit() or not (isbn[9].isdigit() or isbn[9] == "X"): return False
+    total = sum(int(d) * (10 - i) for i, d in enumerate(isbn[:9])) + (10 if isbn[9] == "X" else int(isbn[9]))
+    return total % 11 == 0
+
+
+def to_isbn13(isbn):
+    """Normalize an ISBN (10 or 13 digits, hyphens allowed) to ISBN-13.
+    An ISBN-10 with a wrong check digit is returned unchanged (cleaned), not converted."""
+    isbn = clean_isbn(isbn)
+    if is_valid_isbn10(isbn):
+        body = "978" + isbn[:9]
+        total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+        return body + str((10 - total % 10) % 10)
+    return isbn
+
+
+def to_isbn10(isbn13):
+    """ISBN-10 for a 978 ISBN-13 (None otherwise: 979 has no ISBN-10)"""
+    if not isbn13 or len(isbn13) != 13 or not isbn13.startswith("978"): return None
+    body = isbn13[3:12]
+    check = (11 - sum(int(d) * (10 - i) for i, d in enumerate(body)) % 11) % 11
+    return body + ("X" if check == 10 else str(check))
+
+
+def canonical_isbn(value):
+    """Valid ISBN-13 for any ISBN-10/13 spelling, or "" """
+    isbn = to_isbn13(value)
+    return isbn if is_valid_isbn13(isbn) else ""
+
+
+# --- Whole columns ---
+def _digit_matrix(strings, width):
+    """(n, width) int matrix of the digits of equal-length ASCII strings ('X' -> 10)"""
+    raw = np.frombuffer("".join(strings).encode("ascii"), dtype=np.uint8).reshape(-1, width)
+    digits = raw.astype(np.int64) - 48
+    digits[raw == ord("X")] = 10
+    return digits
+
+
+def clean_isbn_column(values):
+    s = pd.Series(values, dtype=object).astype(str).str.strip()
+    s = s.str.replace(r"\.0$", "", regex=True).str.replace(r"[\s\-]", "", regex=True).str.upper()
+    return s.mask(s.isin(["NAN", "NONE"]), "")
+
+
+def isbn13_column(values):
+    """Canonical ISBN-13 for every value ("" where it is not a valid ISBN-10/13)"""
+    s = clean_isbn_column(values)
+    out = np.full(len(s), "", dtype=object)
+    arr = s.to_numpy(dtype=object)
+
+    is13 = s.str.fullmatch(r"[0-9]{13}").to_numpy()
+    if is13.any():
+        d = _digit_matrix(arr[is13], 13)
+        ok = (10 - (d[:, :12] @ WEIGHTS_13) % 10) % 10 == d[:, 12]
+        idx = np.flatnonzero(is13)[ok]
+        out[idx] = arr[idx]
+
+    is10 = s.str.fullmatch(r"[0-9]{9}[0-9X]").to_numpy()
+    if is10.any():
+        d = _digit_matrix(arr[is10], 10)
+        ok = (d[:, :9] @ WEIGHTS_10 + d[:, 9]) % 11 == 0
+        idx = np.flatnonzero(is10)[ok]
+        # 978 + first nine digits, then the EAN check digit over the new body
+        body = np.hstack([np.tile([9, 7, 8], (ok.sum(), 1)), d[ok, :9]])
+        check = (10 - (body @ WEIGHTS_13) % 10) % 10
+        out[idx] = ["978" + s9 + str(c) for s9, c in zip((a[:9] for a in arr[idx]), check.tolist())]
+    return out
+
+
+def isbn10_column(values):
+    """ISBN-10 for every value that is a valid 978 ISBN (10 or 13), "" otherwise"""
+    isbn13 = isbn13_column(values)
+    out = np.full(len(isbn13), "", dtype=object)
+    mask = np.array([v.startswith("978") for v in isbn13], dtype=bool)
+    if mask.any():
+        d = _digit_matrix(isbn13[mask], 13)[:, 3:12]
+        check = (11 - (d @ WEIGHTS_10) % 11) % 11
+        out[mask] = [v[3:12] + ("X" if c == 10 else str(c)) for v, c in zip(isbn13[mask], check.tolist())]
+    return out
+
+
+class IsbnIndex:
+    """canonical ISBN-13 -> id of the newest book with that ISBN"""
+
+    def __init__(self, ids_by_isbn, dupes=None):
+        self._ids = ids_by_isbn
+        self._dupes = dupes or {}  # ISBN -> ids (oldest first) when registered more than once
+        self._lock = threading.Lock()  # add() / remove() patch the shared index in place
+
+    @classmethod
+    def from_frame(cls, df):
+        if df.empty or "isbn" not in df.columns:
+            return cls({})
+        keys = isbn13_column(df["isbn"].to_numpy())
+        ids = df["id"].to_numpy() if "id" in df.columns else np.arange(len(df))
+        # Iterate oldest -> newest so the newest id wins when a sheet already has duplicates
+        order = np.argsort(ids, kind="stable")
+        keys, ids = keys[order], ids[order]
+        dupes = {}
+        repeated = pd.Series(keys).duplicated(keep=False).to_numpy() & (keys != "")
+        for k, i in zip(keys[repeated], ids[repeated]):
+            dupes.setdefault(k, []).append(int(i))
+        return cls({k: int(i) for k, i in zip(keys, ids) if k}, dupes)
+
+    def add(self, books):
+        """Register [(isbn, id)] of new books (ids larger than any existing), in place.
+        Returns self, so it can be used directly as a SnapshotCache.update() carry."""
+        with self._lock:
+            for isbn, book_id in books:
+                key = canonical_isbn(isbn)
+                if not key:
+                    continue
+                if key in self._ids:
+                    self._dupes[key] = self._dupes.get(key, [self._ids[key]]) + [int(book_id)]
+                self._ids[key] = int(book_id)
+        return self
+
+    def remove(self, books):
+        """Forget [(isbn, id)] of deleted books, in place (returns self)"""
+        with self._lock:
+            for isbn, book_id in books:
+                key = canonical_isbn(isbn)
+                if key in self._dupes:
+                    rest = [i for i in self._dupes.pop(key) if i != int(book_id)]
+                    if len(rest) > 1:
+                        self._dupes[key] = rest
+                    self._ids[key] = rest[-1]
+                elif key and self._ids.get(key) == int(book_id):
+                    del self._ids[key]
+        return self
+
+    def get(self, isbn):
+        """id of the registered book with this ISBN, or None"""
+        key = canonical_isbn(isbn)
+        return self._ids.get(key) if key else None
+
+    def __contains__(self, isbn):
+        return self.get(isbn) is not None
+
+    def __len__(self):
+        return len(self._ids)
@@ -0,0 +1,109 @@
+"""Disk-backed cache for book metadata lookups (SQLite, stdlib only).
+
+Entries are keyed by (provider, normalized ISBN-13). "Not found" answers are
+cached too (negative caching) with their own, shorter TTL. The table is kept
+under `max_entries` by evicting the least recently used rows.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+MISSING = object()
+TOUCH_BATCH = 256      # buffered accessed_at updates written per commit
+TOUCH_INTERVAL = 30.0  # ... or at least this often (seconds)
+
+
+class MetadataCache:
+    def __init__(self, path, ttl=30 * 86400, negative_ttl=86400, max_entries=5000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # (provider, isbn) -> accessed_at not yet written (hits don't commit one by one)
+        self._touched_at = time.monotonic()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            " provider TEXT NOT NULL, isbn TEXT NOT NULL, value TEXT,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (provider, isbn))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS metadata_lru ON metadata (accessed_at)")
+        self._db.commit()
+
+    def get(self, provider, isbn):
+        """Cached value (None = known "not found"), or MISSING"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM metadata WHERE provider = ? AND isbn = ?", (provider, isbn)
+            ).fetchone()
+            if row is not None:
+                value, stored_at = row
+                ttl = self.ttl if value is not None else self.negative_ttl
+                if now - stored_at <= ttl:
+                    self._touched[(provider, isbn)] = now
+                    if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_at > TOUCH_INTERVAL:
+                        self._flush_touched()
+                    if value is None:
+                        self.negative_hits += 1
+                        return None
+                    self.hits += 1
+                    return json.loads(value)
+            self.misses += 1
+            return MISSING
+
+    def put(self, provider, isbn, value):
+        now = time.time()
+        payload = None if value is None else json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._touched.pop((provider, isbn), None)
+            self._db.execute(
+                "INSERT OR REPLACE INTO metadata (provider, isbn, value, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (provider, isbn, payload, now, now),
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM metadata").fetchone()
+            if count > self.max_entries:
+                self._flush_touched()  # LRU order needs the latest access times
+                self._db.execute(
+                    "DELETE FROM metadata WHERE rowid IN (SELECT rowid FROM metadata ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._db.commit()
+
+    def _flush_touched(self):
+        """Write buffered accessed_at updates in one transaction (caller holds the lock)"""
+        if self._touched:
+            self._db.executemany("UPDATE metadata SET accessed_at = ? WHERE provider = ? AND isbn = ?",
+                                 [(t, p, i) for (p, i), t in self._touched.items()])
+            self._db.commit()
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def lookup(self, provider, isbn, fetch):
+        """Return the cached answer or call fetch() and cache it.
+        fetch() returns None for "not found" and raises on transient errors (not cached)."""
+        value = self.get(provider, isbn)
+        if value is not MISSING:
+            return value
+        value = fetch()
+        self.put(provider, isbn, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM metadata").fetchone()
+            total = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.negative_hits) / total if total else 0.0,
+            }
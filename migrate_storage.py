@@ -0,0 +1,65 @@
+"""Move the library between storage backends (Google Sheets / SQLite / Parquet).
+
+    python migrate_storage.py --from sheets --to sqlite
+    python migrate_storage.py --from sqlite --to parquet --parquet-dir booklog_data --chunk-size 2000
+
+Books are streamed chunk by chunk from the source into the destination, whose
+books table is replaced; the category list is copied as well. Paths default
+to the `sqlite_path` / `parquet_dir` settings in .streamlit/secrets.toml.
+Afterwards switch the app over with `storage = "<backend>"` in [booklog].
+"""
+import argparse
+import os
+import sys
+import time
+
+from storage import BACKENDS, migrate, open_storage
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _settings():
+    try:
+        import toml
+        with open(os.path.join(APP_DIR, ".streamlit", "secrets.toml"), encoding="utf-8") as f:
+            return toml.load(f).get("booklog", {})
+    except Exception:
+        return {}
+
+
+def _sheets_conn():
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+    return st.connection("gsheets", type=GSheetsConnection)
+
+
+def main():
+    settings = _settings()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--from", dest="src", choices=BACKENDS, required=True)
+    parser.add_argument("--to", dest="dst", choices=BACKENDS, required=True)
+    parser.add_argument("--sqlite-path", default=settings.get("sqlite_path", os.path.join(APP_DIR, "booklog.sqlite3")))
+    parser.add_argument("--parquet-dir", default=settings.get("parquet_dir", os.path.join(APP_DIR, "booklog_data")))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    if args.src == args.dst:
+        parser.error("--from and --to are the same backend")
+
+    conn = _sheets_conn() if "sheets" in (args.src, args.dst) else None
+    src, dst = (open_storage(kind, conn=conn, sqlite_path=args.sqlite_path, parquet_dir=args.parquet_dir)
+                for kind in (args.src, args.dst))
+
+    start = time.perf_counter()
+    def progress(copied):
+        print(f"\r{copied} books ({time.perf_counter() - start:.1f}s)", end="", flush=True)
+    try:
+        copied = migrate(src, dst, chunk_size=args.chunk_size, progress=progress)
+    except Exception as e:
+        print(f"\nERROR: migration failed: {e}")
+        sys.exit(1)
+    print(f"\nSUCCESS: {copied} books copied from {args.src} to {args.dst} in {time.perf_counter() - start:.1f}s")
+    print(f'Set storage = "{args.dst}" in the [booklog] section of .streamlit/secrets.toml to use it.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Per-rerun timing spans (opt-in profiler).
+
+    with span("sheets.read", worksheet="books") as s:
+        df = conn.read(...)
+        s.set(rows=len(df))
+
+    @timed("google.isbn")
+    def _fetch_google_books(isbn): ...
+
+A Trace collects the spans of one script run. start() installs it for the
+current thread; while no trace is active span() returns a shared no-op and
+timed() calls straight through, so instrumented code costs one thread-local
+lookup. Work handed to an executor is attributed to the submitting rerun by
+wrapping the callable with bind().
+
+Exceptions are recorded on every span they pass through (and re-raised),
+so failures that the app later turns into an empty result still show up.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoSpan()
+
+
+class Span:
+    __slots__ = ("trace", "name", "attrs", "depth", "thread", "start", "end", "error")
+
+    def __init__(self, trace, name, attrs, depth):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.depth = depth
+        self.thread = threading.current_thread().name
+        self.start = self.end = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        _local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _local.depth = self.depth
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.trace._add(self)
+        return False
+
+
+class Trace:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def _add(self, span):
+        with self._lock:
+            if self.end is None:  # late worker spans after the rerun ended are dropped
+                self.spans.append(span)
+
+    def finish(self):
+        with self._lock:
+            if self.end is None:
+                self.end = time.perf_counter()
+        return self
+
+    @property
+    def total_ms(self):
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def rows(self):
+        """Spans as dicts ordered by start time (offsets in ms from the start of the rerun)"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return [{
+            "name": s.name,
+            "start_ms": round((s.start - self.start) * 1000, 2),
+            "ms": round((s.end - s.start) * 1000, 2),
+            "depth": s.depth,
+            "thread": s.thread,
+            "error": s.error,
+            **s.attrs,
+        } for s in spans]
+
+    def to_dict(self):
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.wall)),
+            "trace": self.name,
+            "total_ms": round(self.total_ms, 2),
+            **self.attrs,
+            "spans": self.rows(),
+        }
+
+
+def start(name, **attrs):
+    """Begin a trace for this thread (replaces any unfinished one)"""
+    trace = Trace(name, **attrs)
+    _local.trace, _local.depth = trace, 0
+    return trace
+
+
+def stop():
+    """Finish and detach the current thread's trace (None if there was none)"""
+    trace = getattr(_local, "trace", None)
+    _local.trace, _local.depth = None, 0
+    return trace.finish() if trace is not None else None
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def span(name, **attrs):
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, attrs, getattr(_local, "depth", 0))
+
+
+def timed(name=None):
+    """Decorator: run the function inside span(name or function name)"""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, "trace", None)
+            if trace is None:
+                return fn(*args, **kwargs)
+            with Span(trace, label, {}, getattr(_local, "depth", 0)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind(fn):
+    """fn, run under the caller's trace in whatever thread executes it"""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return fn
+    depth = getattr(_local, "depth", 0)
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        saved = getattr(_local, "trace", None), getattr(_local, "depth", 0)
+        _local.trace, _local.depth = trace, depth
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.trace, _local.depth = saved
+    return run
+
+
+def write_jsonl(path, trace, max_bytes=5_000_000):
+    """Append the trace as one JSON line; the file is rotated to `path`.1 past max_bytes"""
+    line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+    with _log_lock:
+        try:
+            if max_bytes and os.path.getsize(path) > max_bytes:
+                os.replace(path, path + ".1")
+        except OSError:
+            pass
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
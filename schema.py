@@ -0,0 +1,109 @@
+"""Typed in-memory layout of the books table.
+
+Every backend hands rows over as text (that is what the sheet holds).
+typed_books() converts them once, at load time:
+
+    id                     Int32 (missing / unparsable ids become 0, as before)
+    category, status       category
+    created_at, read_date  datetime64 (NaT when empty or unparsable)
+    title ... isbn         str, "" for empty cells (no "nan" / "None" left over)
+    tag_list               tuple of tags split from `tags` (kept as text for editing)
+
+Columns the schema doesn't know pass through untouched. assign() keeps the
+dtypes intact when a write is applied to the cached frame, and cell_str()
+turns typed values back into the sheet's text.
+"""
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ["title", "author", "tags", "notes", "cover_url", "isbn"]
+CATEGORY_COLUMNS = ["category", "status"]
+DATE_FORMATS = {"created_at": "%Y-%m-%d %H:%M:%S", "read_date": "%Y-%m-%d"}
+TAG_LIST = "tag_list"
+_NULL_TEXT = ("nan", "None", "NaT", "<NA>")
+
+
+def split_tags(text):
+    return tuple(t.strip() for t in text.split(",") if t.strip()) if text else ()
+
+
+def _text(col):
+    col = col.astype(object).where(col.notna(), "").astype(str).str.strip()
+    return col.mask(col.isin(_NULL_TEXT), "")
+
+
+def _dates(col):
+    text = _text(col)
+    parsed = pd.to_datetime(text.mask(text == "", None), format="ISO8601", errors="coerce")
+    # Sheets may hand dates back in the locale's format ("2024/01/31 9:05:00"): parse those one by one
+    retry = parsed.isna() & (text != "")
+    if retry.any():
+        parsed[retry] = pd.to_datetime(text[retry], format="mixed", errors="coerce")
+    return parsed
+
+
+def typed_books(df):
+    """Books frame with the schema dtypes (see module docstring); returns a new frame"""
+    df = df.copy()
+    if "id" in df.columns:
+        df["id"] = pd.to_numeric(df["id"], errors="coerce").fillna(0).astype("int64").astype("Int32")
+    for name in TEXT_COLUMNS:
+        if name in df.columns:
+            df[name] = _text(df[name])
+    for name in CATEGORY_COLUMNS:
+        if name in df.columns:
+            df[name] = _text(df[name]).astype("category")
+    for name in DATE_FORMATS:
+        if name in df.columns:
+            df[name] = _dates(df[name])
+    if "tags" in df.columns:
+        df[TAG_LIST] = pd.Series([split_tags(t) for t in df["tags"].tolist()], index=df.index, dtype=object)
+    return df
+
+
+def cell_str(name, val):
+    """Text form of a typed cell value, for the sheet / journal / form defaults"""
+    if val is None or val is pd.NaT or (not isinstance(val, (str, tuple)) and pd.isna(val)):
+        return ""
+    if name in DATE_FORMATS and isinstance(val, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(val).strftime(DATE_FORMATS[name])
+    if name == TAG_LIST:
+        return ", ".join(val)
+    if hasattr(val, "item"):  # numpy scalar
+        return val.item()
+    return val
+
+
+def assign(df, mask, name, val):
+    """df.loc[mask, name] = val, converting `val` to the column's dtype (in place)"""
+    col = df[name]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        val = cell_str(name, val)
+        if val not in col.cat.categories:
+            df[name] = col.cat.add_categories([val])
+    elif name in DATE_FORMATS and pd.api.types.is_datetime64_any_dtype(col.dtype):
+        val = _dates(pd.Series([val])).iloc[0]
+    elif name == "id" and isinstance(col.dtype, pd.Int32Dtype):
+        val = int(val)
+    elif name in TEXT_COLUMNS:
+        val = cell_str(name, val)
+        val = "" if val in _NULL_TEXT else str(val).strip()
+    df.loc[mask, name] = val
+    if name == "tags" and TAG_LIST in df.columns:
+        tags = split_tags(val)
+        for idx in df.index[np.asarray(mask, dtype=bool)]:
+            df.at[idx, TAG_LIST] = tags
+
+
+def concat_books(frames):
+    """pd.concat for typed frames; category columns keep their dtype (categories are unioned)"""
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    for name in CATEGORY_COLUMNS:
+        cols = [f[name] for f in frames if name in f.columns]
+        if not cols or not all(isinstance(c.dtype, pd.CategoricalDtype) for c in cols):
+            continue
+        cats = list(dict.fromkeys(c for col in cols for c in col.cat.categories))
+        frames = [f.assign(**{name: f[name].cat.set_categories(cats)}) if name in f.columns else f for f in frames]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,141 @@
+"""In-memory inverted index for the keyword filter.
+
+Text is NFKC-normalized and lower-cased, then indexed as character unigrams
+and bigrams so Japanese titles without spaces can be searched. A query term
+is looked up through its bigrams (rarest posting list first) and the few
+remaining candidates are verified with a vectorized substring check.
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+SEARCH_FIELDS = {"title": 3.0, "author": 2.0, "tags": 1.5, "notes": 1.0}
+
+
+def normalize_text(val):
+    if val is None or (isinstance(val, float) and val != val):
+        return ""
+    s = str(val)
+    if s in ("nan", "None"):
+        return ""
+    return unicodedata.normalize("NFKC", s).lower()
+
+
+def ngrams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    grams.discard(" ")
+    return grams
+
+
+def split_query(query):
+    return [t for t in re.split(r"\s+", normalize_text(query).strip()) if t]
+
+
+class SearchIndex:
+    """Postings point at slots (one per indexed row version); `_positions` maps a slot
+    to the row's position in the frame, -1 once the row is gone or was re-indexed.
+    That lets local writes patch the index (prepended / replaced / dropped) instead of
+    rebuilding it for every new snapshot version."""
+
+    def __init__(self, fields, positions):
+        self._fields = fields  # name -> (boost, texts ndarray by slot, {gram: slots})
+        self._positions = positions
+        self.size = int((positions >= 0).sum())
+
+    @classmethod
+    def from_frame(cls, df, boosts=SEARCH_FIELDS):
+        empty = cls({name: (boost, np.empty(0, dtype=object), {}) for name, boost in boosts.items() if name in df.columns},
+                    np.empty(0, dtype=np.int64))
+        return empty._with_rows(df, np.arange(len(df)), np.arange(len(df)))
+
+    def _with_rows(self, df, rows, positions):
+        """New index where df rows at `rows` are indexed as new slots at frame `positions`
+        (`self._positions` must already be the updated mapping for the old slots)"""
+        first = len(self._positions)
+        slots = np.arange(first, first + len(rows))
+        fields = {}
+        for name, (boost, texts, postings) in self._fields.items():
+            new_texts = [normalize_text(v) for v in df[name].to_numpy()[rows].tolist()] if name in df.columns else [""] * len(rows)
+            added = {}
+            for slot, text in zip(slots.tolist(), new_texts):
+                for gram in ngrams(text):
+                    added.setdefault(gram, []).append(slot)
+            postings = dict(postings)  # copy-on-write: readers of the previous version keep theirs
+            for gram, new in added.items():
+                new = np.asarray(new, dtype=np.int32)
+                old = postings.get(gram)
+                postings[gram] = new if old is None else np.concatenate([old, new])
+            fields[name] = (boost, np.concatenate([texts, np.asarray(new_texts, dtype=object)]), postings)
+        return SearchIndex(fields, np.concatenate([self._positions, np.asarray(positions, dtype=np.int64)]))
+
+    def prepended(self, new_rows):
+        """Index of concat([new_rows, frame]): every existing row moves down by len(new_rows)"""
+        n = len(new_rows)
+        positions = np.where(self._positions >= 0, self._positions + n, -1)
+        return SearchIndex(self._fields, positions)._with_rows(new_rows, np.arange(n), np.arange(n))
+
+    def replaced(self, df, positions):
+        """Index after the rows at `positions` of `df` were edited in place"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return self
+        remaining = np.where(np.isin(self._positions, positions), -1, self._positions)
+        return SearchIndex(self._fields, remaining)._with_rows(df, positions, positions)
+
+    def dropped(self, positions):
+        """Index after the rows at `positions` (of the old frame) were removed"""
+        removed = np.zeros(self.size, dtype=bool)
+        removed[np.asarray(positions, dtype=np.int64)] = True
+        shift = np.cumsum(removed)
+        live = self._positions >= 0
+        new = np.full(len(self._positions), -1, dtype=np.int64)
+        keep = live & ~removed[np.where(live, self._positions, 0)]
+        new[keep] = self._positions[keep] - shift[self._positions[keep]]
+        return SearchIndex(self._fields, new)
+
+    def _term_candidates(self, postings, term):
+        grams = [term] if len(term) == 1 else [term[i:i + 2] for i in range(len(term) - 1)]
+        lists = []
+        for g in set(grams):
+            p = postings.get(g)
+            if p is None:
+                return None
+            lists.append(p)
+        lists.sort(key=len)
+        cands = lists[0]
+        for p in lists[1:]:
+            cands = np.intersect1d(cands, p, assume_unique=True)
+            if not len(cands):
+                return None
+        return cands
+
+    def search(self, query):
+        """Row positions matching ALL terms, best score first (ties keep frame order)"""
+        terms = split_query(query)
+        if not terms:
+            return np.arange(self.size)
+        scores = None
+        for term in terms:
+            term_scores = np.zeros(len(self._positions), dtype=np.float32)
+            for boost, texts, postings in self._fields.values():
+                cands = self._term_candidates(postings, term)
+                if cands is None:
+                    continue
+                if len(term) > 2:
+                    # Bigram hits are only a superset; confirm the real substring
+                    hit = [term in t for t in texts[cands].tolist()]
+                    cands = cands[np.asarray(hit, dtype=bool)]
+                term_scores[cands] += boost
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = (scores + term_scores) * ((scores > 0) & (term_scores > 0))
+            if not scores.any():
+                return np.empty(0, dtype=np.int64)
+        matched = np.flatnonzero(scores)
+        positions = self._positions[matched]
+        live = positions >= 0
+        matched, positions = matched[live], positions[live]
+        return positions[np.lexsort((positions, -scores[matched]))]
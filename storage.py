@@ -0,0 +1,401 @@
+"""Storage backends for the books and categories tables.
+
+Every backend implements the same small interface:
+
+    read_books()                  -> DataFrame of all rows, as stored
+    get_book(book_id)             -> dict or None
+    insert_books(rows, columns)   append rows (dicts)
+    patch_books(patches, deletes) {id: {col: value}} cell updates + row deletes, in one batch
+    replace_books(df)             overwrite the whole table
+    iter_books(chunk_size)        DataFrames of at most chunk_size rows (streamed where possible)
+    load_chunks(chunks)           replace the table with an iterable of DataFrames, chunk by chunk
+    read_categories() / write_categories(names)
+
+- SheetsStorage:  Google Sheets through st-gsheets-connection (the original layout)
+- SQLiteStorage:  one local database file; indexes on id / isbn / category
+- ParquetStorage: columnar snapshot files, rewritten atomically on every write
+                  (fits read-heavy libraries; the write-behind queue batches edits)
+
+open_storage(kind, ...) builds one from a name ("sheets", "sqlite", "parquet");
+migrate() copies a library between two backends chunk by chunk.
+"""
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from write_queue import apply_patches
+try:
+    from gspread.utils import rowcol_to_a1
+except ImportError:  # only needed by the Sheets backend
+    rowcol_to_a1 = None
+
+BOOK_COLUMNS = ["id", "title", "author", "category", "tags", "status", "notes", "cover_url", "read_date", "isbn", "created_at"]
+DEFAULT_CATEGORIES = ["技術書", "ビジネス", "小説", "その他"]
+BACKENDS = ("sheets", "sqlite", "parquet")
+PARQUET_ROW_GROUP = 10_000  # small enough for id lookups to skip most of the file
+
+
+def _cell(val):
+    """Plain Python value for a cell (NaN/None -> "", numpy scalars -> Python)"""
+    if val is None or (isinstance(val, float) and pd.isna(val)):
+        return ""
+    if hasattr(val, "item"):  # numpy scalar
+        return val.item()
+    return val
+
+
+def _book_id(val):
+    try:
+        return int(float(val))
+    except (TypeError, ValueError):
+        return None
+
+
+class BookStorage:
+    name = "base"
+
+    def read_books(self):
+        raise NotImplementedError
+
+    def get_book(self, book_id):
+        df = self.read_books()
+        if df.empty or "id" not in df.columns:
+            return None
+        match = df[pd.to_numeric(df["id"], errors="coerce") == int(book_id)]
+        return None if match.empty else {k: _cell(v) for k, v in match.iloc[0].items()}
+
+    def insert_books(self, rows, columns=None):
+        raise NotImplementedError
+
+    def can_append(self):
+        """Whether insert_books() can work here (checked before sending: appends aren't idempotent)"""
+        return True
+
+    def patch_books(self, patches, deletes=()):
+        raise NotImplementedError
+
+    def replace_books(self, df):
+        raise NotImplementedError
+
+    def iter_books(self, chunk_size=500):
+        df = self.read_books()
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+    def load_chunks(self, chunks):
+        self.replace_books(pd.DataFrame(columns=BOOK_COLUMNS))
+        for chunk in chunks:
+            self.insert_books(chunk.to_dict("records"), BOOK_COLUMNS)
+
+    def read_categories(self):
+        raise NotImplementedError
+
+    def write_categories(self, names):
+        raise NotImplementedError
+
+
+# --- Google Sheets ---
+class SheetsStorage(BookStorage):
+    """The books / categories worksheets of a GSheetsConnection"""
+    name = "sheets"
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _worksheet(self):
+        """gspread worksheet for cell-level calls, or None (public-URL / read-only connections)"""
+        try:
+            return self.conn.client._select_worksheet(worksheet="books")
+        except Exception:
+            return None
+
+    def read_books(self):
+        return self.conn.read(worksheet="books", ttl=0)
+
+    def can_append(self):
+        return self._worksheet() is not None
+
+    def insert_books(self, rows, columns=None):
+        """Append at the bottom of the sheet (only the new rows are sent)"""
+        worksheet = self.conn.client._select_worksheet(worksheet="books")
+        columns = columns or BOOK_COLUMNS
+        values = [[_cell(row.get(c, "")) for c in columns] for row in rows]
+        worksheet.append_rows(values, value_input_option="USER_ENTERED")
+
+    def patch_books(self, patches, deletes=()):
+        """Changed cells + deleted rows in one batch each"""
+        worksheet = self._worksheet()
+        if worksheet is None or not hasattr(worksheet, "batch_update"):
+            # Fallback: read, apply, rewrite the whole worksheet
+            df = self.read_books()
+            if "id" in df.columns:
+                df["id"] = pd.to_numeric(df["id"], errors="coerce").fillna(0).astype(int)
+            self.replace_books(apply_patches(df, patches, deletes))
+            return
+
+        header = worksheet.row_values(1)
+        id_col = header.index("id") + 1
+        row_of = {}
+        for row_no, val in enumerate(worksheet.col_values(id_col)[1:], start=2):
+            book_id = _book_id(val)
+            if book_id is not None:
+                row_of[book_id] = row_no
+
+        cells = []
+        for book_id, fields in patches.items():
+            row_no = row_of.get(book_id)
+            if row_no is None: continue
+            for name, val in fields.items():
+                if name in header:
+                    cells.append({"range": rowcol_to_a1(row_no, header.index(name) + 1), "values": [[_cell(val)]]})
+        if cells:
+            worksheet.batch_update(cells, value_input_option="USER_ENTERED")
+
+        # Delete bottom-up so earlier row numbers stay valid
+        rows = sorted((row_of[i] for i in deletes if i in row_of), reverse=True)
+        if rows:
+            worksheet.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {"sheetId": worksheet.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}}}
+                for r in rows
+            ]})
+
+    def replace_books(self, df):
+        self.conn.update(worksheet="books", data=df)
+
+    def iter_books(self, chunk_size=500):
+        """Row ranges of the sheet one request at a time (whole-sheet read without a gspread client)"""
+        worksheet = self._worksheet()
+        if worksheet is None or not hasattr(worksheet, "get"):
+            yield from super().iter_books(chunk_size)
+            return
+        header = worksheet.row_values(1)
+        if not header:
+            return
+        last_col = rowcol_to_a1(1, len(header)).rstrip("0123456789")
+        start = 2
+        while True:
+            values = worksheet.get(f"A{start}:{last_col}{start + chunk_size - 1}")
+            if not values:
+                return
+            yield pd.DataFrame([v + [""] * (len(header) - len(v)) for v in values], columns=header)
+            if len(values) < chunk_size:
+                return
+            start += chunk_size
+
+    def read_categories(self):
+        df = self.conn.read(worksheet="categories", ttl=0)
+        return [] if df.empty or "name" not in df.columns else df["name"].dropna().astype(str).tolist()
+
+    def write_categories(self, names):
+        self.conn.update(worksheet="categories", data=pd.DataFrame({"name": list(names)}))
+
+
+# --- SQLite ---
+class SQLiteStorage(BookStorage):
+    """Books in a local SQLite file (WAL, one shared connection behind a lock)"""
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        cols = ", ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in BOOK_COLUMNS if c != "id")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS books (id INTEGER PRIMARY KEY, {cols})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS books_category ON books (category)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS categories (position INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        self._db.commit()
+
+    @staticmethod
+    def _values(row):
+        return [_book_id(row.get("id"))] + [str(_cell(row.get(c, ""))) for c in BOOK_COLUMNS[1:]]
+
+    def read_books(self):
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(BOOK_COLUMNS)} FROM books ORDER BY id", self._db)
+
+    def get_book(self, book_id):
+        with self._lock:
+            cur = self._db.execute(f"SELECT {', '.join(BOOK_COLUMNS)} FROM books WHERE id = ?", (int(book_id),))
+            row = cur.fetchone()
+        return None if row is None else dict(zip(BOOK_COLUMNS, row))
+
+    def insert_books(self, rows, columns=None):
+        placeholders = ", ".join("?" * len(BOOK_COLUMNS))
+        with self._lock, self._db:
+            self._db.executemany(f"INSERT OR REPLACE INTO books ({', '.join(BOOK_COLUMNS)}) VALUES ({placeholders})",
+                                 [self._values(r) for r in rows])
+
+    def patch_books(self, patches, deletes=()):
+        with self._lock, self._db:
+            for book_id, fields in patches.items():
+                fields = {k: v for k, v in fields.items() if k in BOOK_COLUMNS and k != "id"}
+                if fields:
+                    assignments = ", ".join(f"{k} = ?" for k in fields)
+                    self._db.execute(f"UPDATE books SET {assignments} WHERE id = ?",
+                                     [str(_cell(v)) for v in fields.values()] + [int(book_id)])
+            if deletes:
+                self._db.executemany("DELETE FROM books WHERE id = ?", [(int(i),) for i in deletes])
+
+    def replace_books(self, df):
+        rows = df.to_dict("records")
+        placeholders = ", ".join("?" * len(BOOK_COLUMNS))
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM books")
+            self._db.executemany(f"INSERT OR REPLACE INTO books ({', '.join(BOOK_COLUMNS)}) VALUES ({placeholders})",
+                                 [self._values(r) for r in rows])
+
+    def iter_books(self, chunk_size=500):
+        last_id = None
+        while True:
+            with self._lock:
+                # Keyset pagination: each chunk is one indexed range scan, whatever its offset
+                chunk = pd.read_sql_query(
+                    f"SELECT {', '.join(BOOK_COLUMNS)} FROM books WHERE id > ? ORDER BY id LIMIT ?",
+                    self._db, params=(-1 if last_id is None else last_id, chunk_size))
+            if chunk.empty:
+                return
+            yield chunk
+            last_id = int(chunk["id"].iloc[-1])
+
+    def read_categories(self):
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT name FROM categories ORDER BY position")]
+
+    def write_categories(self, names):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM categories")
+            self._db.executemany("INSERT INTO categories (position, name) VALUES (?, ?)", list(enumerate(names)))
+
+
+# --- Parquet ---
+class ParquetStorage(BookStorage):
+    """books.parquet / categories.parquet in a directory; each write replaces the file atomically"""
+    name = "parquet"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.books_path = os.path.join(directory, "books.parquet")
+        self.categories_path = os.path.join(directory, "categories.parquet")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _normalize(df):
+        df = df.reindex(columns=BOOK_COLUMNS)
+        out = df.drop(columns="id").astype(object).where(df.drop(columns="id").notna(), "").astype(str)
+        out.insert(0, "id", pd.to_numeric(df["id"], errors="coerce").fillna(0).astype("int64"))
+        return out
+
+    def _write(self, path, df):
+        tmp = path + ".tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, row_group_size=PARQUET_ROW_GROUP)
+        os.replace(tmp, path)
+
+    def _read(self):
+        if not os.path.exists(self.books_path):
+            return pd.DataFrame(columns=BOOK_COLUMNS)
+        return pq.read_table(self.books_path).to_pandas()
+
+    def read_books(self):
+        with self._lock:
+            return self._read()
+
+    def get_book(self, book_id):
+        if not os.path.exists(self.books_path):
+            return None
+        with self._lock:
+            # Row-group statistics on id let pyarrow skip most of the file
+            table = pq.read_table(self.books_path, filters=[("id", "=", int(book_id))])
+        rows = table.to_pylist()
+        return rows[0] if rows else None
+
+    def insert_books(self, rows, columns=None):
+        new = self._normalize(pd.DataFrame(rows))
+        with self._lock:
+            df = self._read()
+            df = df[~df["id"].isin(new["id"])]
+            self._write(self.books_path, pd.concat([df, new], ignore_index=True))
+
+    def patch_books(self, patches, deletes=()):
+        with self._lock:
+            df = self._read()
+            # The stored frame is already normalized; patched cells are converted on the way in
+            patches = {i: {k: str(_cell(v)) for k, v in f.items() if k in BOOK_COLUMNS and k != "id"}
+                       for i, f in patches.items()}
+            self._write(self.books_path, apply_patches(df, patches, deletes))
+
+    def replace_books(self, df):
+        with self._lock:
+            self._write(self.books_path, self._normalize(df))
+
+    def iter_books(self, chunk_size=500):
+        if not os.path.exists(self.books_path):
+            return
+        for batch in pq.ParquetFile(self.books_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    def load_chunks(self, chunks):
+        """Streams the chunks into one file (insert_books per chunk would rewrite it every time)"""
+        tmp = self.books_path + ".tmp"
+        writer = None
+        with self._lock:
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(self._normalize(chunk), preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp, table.schema)
+                    writer.write_table(table, row_group_size=PARQUET_ROW_GROUP)
+            finally:
+                if writer is not None:
+                    writer.close()
+            if writer is None:
+                self._write(self.books_path, self._normalize(pd.DataFrame(columns=BOOK_COLUMNS)))
+            else:
+                os.replace(tmp, self.books_path)
+
+    def read_categories(self):
+        if not os.path.exists(self.categories_path):
+            return []
+        return pq.read_table(self.categories_path).column("name").to_pylist()
+
+    def write_categories(self, names):
+        with self._lock:
+            self._write(self.categories_path, pd.DataFrame({"name": [str(n) for n in names]}))
+
+
+def open_storage(kind, conn=None, sqlite_path="booklog.sqlite3", parquet_dir="booklog_data"):
+    if kind == "sheets":
+        return SheetsStorage(conn)
+    if kind == "sqlite":
+        return SQLiteStorage(sqlite_path)
+    if kind == "parquet":
+        return ParquetStorage(parquet_dir)
+    raise ValueError(f"unknown storage backend: {kind!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def migrate(src, dst, chunk_size=500, progress=None):
+    """Copy every book and the category list from `src` to `dst` (dst's books are replaced).
+    Rows are read and written one chunk at a time. Returns the number of books copied."""
+    copied = 0
+
+    def chunks():
+        nonlocal copied
+        for chunk in src.iter_books(chunk_size):
+            chunk = chunk.reindex(columns=BOOK_COLUMNS)
+            chunk = chunk[chunk["id"].map(_book_id).notna()]  # blank / junk rows at the bottom of a sheet
+            if chunk.empty:
+                continue
+            chunk = chunk.assign(id=chunk["id"].map(_book_id).astype("int64"))
+            yield chunk.astype(object).where(chunk.notna(), "")
+            copied += len(chunk)
+            if progress: progress(copied)
+
+    dst.load_chunks(chunks())
+    dst.write_categories(src.read_categories() or DEFAULT_CATEGORIES)
+    return copied
@@ -0,0 +1,122 @@
+"""Live barcode scanning on a stream of video frames.
+
+Frames are handed to `LiveScanner.submit()` from the camera callback and
+decoded in a worker thread. The hand-off is a one-slot mailbox: a frame that
+arrives while the previous one is still being decoded replaces the waiting
+one, so the worker always sees the newest frame and slow decoding never
+builds a backlog. Once the same ISBN is read in `confirm_frames` consecutive
+decoded frames the scanner stops and reports it.
+
+`scan_video()` feeds a recorded video file through the same path, so the
+scanner can be tested without a camera.
+"""
+import threading
+import time
+
+import cv2
+
+from barcode_scan import decode_isbn
+
+
+class LiveScanner:
+    def __init__(self, confirm_frames=3, decode=None, on_confirmed=None):
+        self.confirm_frames = confirm_frames
+        self.decode = decode or (lambda frame: decode_isbn(frame, retries=False)[0])
+        self.on_confirmed = on_confirmed
+        self.result = None
+        self.frames_in = 0
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        self.confirmed = threading.Event()
+        self._latest = None
+        self._streak = (None, 0)
+        self._stopped = False
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self):
+        return self._stopped or self.confirmed.is_set()
+
+    def submit(self, frame):
+        """Offer a frame (grayscale array or anything to_gray() accepts); never blocks the caller"""
+        with self._cond:
+            if self.done:
+                return
+            self.frames_in += 1
+            if self._latest is not None:
+                self.frames_skipped += 1
+            self._latest = frame
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """The confirmed ISBN, or None on timeout / stop"""
+        self.confirmed.wait(timeout)
+        return self.result
+
+    def drain(self, timeout=None):
+        """Wait until every submitted frame has been decoded (or the scan ended)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done or (self._latest is None and not self._busy), timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                while self._latest is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                frame, self._latest = self._latest, None
+                self._busy = True
+            try:
+                isbn = self.decode(frame)
+            except Exception:
+                isbn = None
+            self.frames_decoded += 1
+            last, count = self._streak
+            self._streak = (isbn, count + 1 if isbn and isbn == last else (1 if isbn else 0))
+            if self._streak[1] >= self.confirm_frames:
+                self.result = isbn
+                with self._cond:
+                    self.confirmed.set()
+                    self._cond.notify_all()
+                if self.on_confirmed:
+                    self.on_confirmed(isbn)
+                return
+
+    def stats(self):
+        return {"in": self.frames_in, "decoded": self.frames_decoded, "skipped": self.frames_skipped,
+                "result": self.result}
+
+
+def scan_video(path, confirm_frames=3, realtime=True, scanner=None):
+    """Run a video file through a LiveScanner. realtime=True paces frames at the file's fps
+    like a camera would; False pushes them as fast as they can be read.
+    Returns (isbn or None, scanner)."""
+    scanner = scanner or LiveScanner(confirm_frames)
+    cap = cv2.VideoCapture(path)
+    interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30)
+    next_at = time.monotonic()
+    try:
+        while not scanner.done:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            scanner.submit(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            if realtime:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.monotonic()))
+    finally:
+        cap.release()
+    scanner.drain()  # the last frame may still be in the worker
+    scanner.stop()
+    return scanner.result, scanner
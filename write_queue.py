@@ -0,0 +1,194 @@
+"""Write-behind queue for book edits / deletes.
+
+Edits are journaled to a local file first, merged per book id in memory and
+flushed to the sheet in one batch (on a timer or when the queue is full).
+A journal left behind by a crash is replayed when the queue is created.
+Batches flushed while a snapshot load is reading are kept until that load
+is done, so a read that missed them still gets them overlaid.
+"""
+import json
+import os
+import threading
+import time
+
+from schema import assign
+
+
+def apply_patches(df, patches, deletes=()):
+    """Return a copy of `df` with row patches ({id: {col: value}}) and deletes applied
+    (values are converted to the column dtypes of a typed books frame, see schema.py)"""
+    if df.empty or (not patches and not deletes):
+        return df
+    df = df.copy()
+    if deletes:
+        df = df[~df['id'].isin(list(deletes))]
+    for book_id, fields in patches.items():
+        mask = (df['id'] == book_id).fillna(False)
+        if not mask.any():
+            continue
+        for name, val in fields.items():
+            if name in df.columns:
+                assign(df, mask, name, val)
+    return df
+
+
+def _entry(book_id, fields):
+    return {"op": "delete", "id": book_id} if fields is None else {"op": "patch", "id": book_id, "fields": fields}
+
+
+def _merge_into(pending, entry):
+    """Merge one journal entry into an {id: fields or None} map"""
+    book_id = entry["id"]
+    if entry["op"] == "delete":
+        pending[book_id] = None
+    elif book_id in pending and pending[book_id] is None:
+        return  # already deleted; later edits are moot
+    else:
+        pending.setdefault(book_id, {}).update(entry["fields"])
+
+
+class WriteBehindQueue:
+    """Pending row patches keyed by book id (None = delete)"""
+
+    def __init__(self, flush_fn, journal_path, flush_interval=5.0, max_pending=20):
+        self.flush_fn = flush_fn
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.batches = 0
+        self.last_error = None
+        self._pending = {}
+        self._seq = {}  # id -> change counter, to detect edits made during a flush
+        self._generation = 0  # number of successful flushes
+        self._readers = {}  # generation at read start -> loads still reading
+        self._recent = []  # [(generation, batch)] flushed while a load was reading
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._replay_journal()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    # --- Enqueue ---
+    def patch(self, book_id, fields):
+        self._record({"op": "patch", "id": int(book_id), "fields": fields})
+
+    def delete(self, book_id):
+        self._record({"op": "delete", "id": int(book_id)})
+
+    def _record(self, entry):
+        with self._lock:
+            # Journal first: once this returns the edit survives a crash
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._merge(entry)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def _merge(self, entry):
+        _merge_into(self._pending, entry)
+        self._seq[entry["id"]] = self._seq.get(entry["id"], 0) + 1
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._merge(json.loads(line))
+                except (ValueError, KeyError):
+                    continue  # torn last line from a crash mid-write
+        if self._pending:
+            self._wake.set()
+
+    # --- Read side ---
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def max_id(self):
+        with self._lock:
+            return max(self._pending, default=0)
+
+    def load(self, read):
+        """read() (a full snapshot load) with pending edits overlaid. Edits flushed while
+        read() ran are overlaid too: the read may have fetched the rows before they landed."""
+        with self._lock:
+            start = self._generation
+            self._readers[start] = self._readers.get(start, 0) + 1
+        try:
+            df = read()
+        finally:
+            with self._lock:
+                self._readers[start] -= 1
+                if not self._readers[start]:
+                    del self._readers[start]
+                overlay = {}
+                for generation, batch in self._recent:
+                    if generation > start:
+                        for book_id, fields in batch.items():
+                            _merge_into(overlay, _entry(book_id, fields))
+                for book_id, fields in self._pending.items():
+                    _merge_into(overlay, _entry(book_id, fields))
+                oldest = min(self._readers, default=self._generation)
+                self._recent = [(g, b) for g, b in self._recent if g > oldest]
+        patches = {i: f for i, f in overlay.items() if f is not None}
+        deletes = [i for i, f in overlay.items() if f is None]
+        return apply_patches(df, patches, deletes)
+
+    # --- Flush ---
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                batch = dict(self._pending)
+                seq = dict(self._seq)
+            patches = {i: f for i, f in batch.items() if f is not None}
+            deletes = [i for i, f in batch.items() if f is None]
+            try:
+                self.flush_fn(patches, deletes)
+            except Exception as e:
+                self.last_error = f"{time.strftime('%H:%M:%S')} {e}"
+                return False
+            with self._lock:
+                self._generation += 1
+                if self._readers:
+                    self._recent.append((self._generation, batch))
+                for book_id in batch:
+                    # Keep entries that were edited again while we were writing
+                    if self._seq.get(book_id) == seq[book_id]:
+                        del self._pending[book_id]
+                        del self._seq[book_id]
+                self._rewrite_journal()
+                self.flushed += len(batch)
+                self.batches += 1
+                self.last_error = None
+            return True
+
+    def _rewrite_journal(self):
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for book_id, fields in self._pending.items():
+                f.write(json.dumps(_entry(book_id, fields), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "last_error": self.last_error,
+            }